@@ -6,226 +6,433 @@ Extracted from agricultural_chatbot.py to maintain original functionality.
 
 import streamlit as st
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+import html
+import logging
+from functools import partial
+from operator import itemgetter
+
+from src.services.database import get_mongodb_manager, update_interaction_results_in_background
+
+logger = logging.getLogger(__name__)
+
+# ==================== DISPLAY CONSTANTS ====================
+
+MAX_SESSION_INTERACTIONS = 50
+HISTORY_VISIBLE_CARDS = 20
+
+# Longest crop / location text shown on a card before it is clipped
+_CROP_DISPLAY_MAX = 30
+_LOCATION_DISPLAY_MAX = 40
+
+# Indexed directly by datetime.month (index 0 unused)
+_MONTHS_INDO = (
+    '', 'Januari', 'Februari', 'Maret', 'April',
+    'Mei', 'Juni', 'Juli', 'Agustus',
+    'September', 'Oktober', 'November', 'Desember'
+)
+
+_CROP_ICONS = {
+    'rice': '🌾', 'maize': '🌽', 'cotton': '🏭', 'banana': '🍌',
+    'mango': '🥭', 'orange': '🍊', 'coffee': '☕', 'pomegranate': '🍇',
+    'watermelon': '🍉', 'chickpea': '🫘', 'kidneybeans': '🫘',
+    'lentil': '🫘', 'blackgram': '🫘', 'mungbean': '🫘',
+    'pigeonpeas': '🫘', 'mothbeans': '🫘', 'papaya': '🍈',
+    'jute': '🌿', 'muskmelon': '🍈'
+}
+
+# Sidebar messages
+_EMPTY_HISTORY_INFO = "Belum ada interaksi tersimpan"
+_EMPTY_HISTORY_HINT_MD = "*Gunakan **➕ New** untuk membuat preset atau input manual*"
+
+# Indexed by (count != 1)
+_INTERACTION_NOUN = ("interaction", "interactions")
+
+# Shared stylesheet for history cards, emitted once per render ahead of the cards
+_HISTORY_CSS = """
+<style>
+.history-card {
+    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+    border-radius: 10px;
+    padding: 12px 14px;
+    margin: 6px 0;
+    color: #2c3e50;
+    border: 1px solid #e0e6ed;
+    box-shadow: 0 1px 6px rgba(0,0,0,0.05);
+}
+.history-card.active {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border: 1px solid #667eea;
+    box-shadow: 0 2px 8px rgba(102, 126, 234, 0.3);
+}
+.history-card .hc-row { display: flex; align-items: center; justify-content: space-between; }
+.history-card .hc-main { display: flex; align-items: center; gap: 10px; flex: 1; min-width: 0; }
+.history-card .hc-icon { font-size: 18px; }
+.history-card .hc-text { flex: 1; min-width: 0; }
+.history-card .hc-title { font-weight: bold; font-size: 14px; line-height: 1.3; margin-bottom: 3px; }
+.history-card .hc-sub { font-size: 11px; line-height: 1.2; color: #34495e; }
+.history-card.active .hc-sub { color: inherit; opacity: 0.85; }
+.history-card .hc-side { display: flex; align-items: center; gap: 6px; flex-shrink: 0; }
+.history-card .hc-status { font-size: 11px; color: #7f8c8d; }
+.history-card.active .hc-status { font-size: 10px; color: inherit; opacity: 0.9; }
+.history-card .hc-badge { color: white; padding: 2px 6px; border-radius: 8px; font-size: 9px; font-weight: bold; white-space: nowrap; }
+.history-card .hc-badge.low { background: #e74c3c; }
+.history-card .hc-badge.med { background: #f39c12; }
+.history-card .hc-badge.high { background: #27ae60; }
+</style>
+"""
+
+# Active and inactive cards share one layout and differ only in these values
+_ACTIVE_CARD_STYLE = {'card_class': 'history-card active', 'status_icon': '🟢'}
+_INACTIVE_CARD_STYLE = {'card_class': 'history-card', 'status_icon': '🔄'}
+
+_CARD_TMPL = """
+<div class="{card_class}">
+    <div class="hc-row">
+        <div class="hc-main">
+            <span class="hc-icon">{{crop_icon}}</span>
+            <div class="hc-text">
+                <div class="hc-title">{{crop_display}}</div>
+                <div class="hc-sub">{{location_short}} - {{timestamp_indo}}</div>
+            </div>
+        </div>
+        <div class="hc-side">{{badge_html}}<span class="hc-status">{status_icon}</span></div>
+    </div>
+</div>
+"""
+
+# Styles are applied once at import; each card then only fills in its display strings
+_ACTIVE_CARD_TMPL = _CARD_TMPL.format_map(_ACTIVE_CARD_STYLE)
+_INACTIVE_CARD_TMPL = _CARD_TMPL.format_map(_INACTIVE_CARD_STYLE)
+
+# Inline confidence badge, shown in the card's right-hand flex group
+_BADGE_TMPL = '<span class="hc-badge {badge_class}">🤖 {badge_text} ({percent}%)</span>'
+
+# (css class, label) per confidence tier, indexed by (percent >= 50) + (percent >= 70)
+_BADGE_TIERS = (
+    ("low", "LOW"),
+    ("med", "MED"),
+    ("high", "HIGH"),
+)
+
+# ==================== INTERACTION RECORDS ====================
+
+def _clip(text: str, limit: int) -> str:
+    """Clip text to `limit` characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+
+def _build_badge_html(interaction: Dict[str, Any]) -> str:
+    """Render the inline ML confidence badge for a history card (empty without one)"""
+    ml_result = interaction.get('ml_result')
+    confidence = ml_result and ml_result.get('confidence')
+    if confidence:
+        # Quantize once so the tier always agrees with the percentage shown
+        percent = round(confidence * 100)
+        badge_class, badge_text = _BADGE_TIERS[(percent >= 50) + (percent >= 70)]
+        return _BADGE_TMPL.format(badge_class=badge_class, badge_text=badge_text, percent=percent)
+    return ''
+
+
+@st.cache_data(max_entries=500, show_spinner=False)
+def _render_card_html(crop_icon: str, crop_display: str, location_short: str,
+                      timestamp_indo: str, badge_html: str) -> Tuple[str, str]:
+    """Render the (active, inactive) card HTML; cached across reruns and sessions
+    
+    Interactions reloaded from MongoDB come back without their cached display, so
+    identical cards are served from here instead of being formatted again.
+    """
+    # User-entered text is escaped so it cannot break the card markup
+    fields = {
+        'crop_icon': crop_icon,
+        'crop_display': html.escape(crop_display),
+        'location_short': html.escape(location_short),
+        'timestamp_indo': timestamp_indo,
+        'badge_html': badge_html,
+    }
+    return _ACTIVE_CARD_TMPL.format_map(fields), _INACTIVE_CARD_TMPL.format_map(fields)
+
+
+def build_interaction_display(interaction: Dict[str, Any]) -> Dict[str, str]:
+    """Precompute the strings and card HTML shown on a history card and cache them on the interaction"""
+    dt = interaction['timestamp']
+    sensor_data = interaction['sensor_data']
+    
+    crop = sensor_data.get('selected_crop', 'unknown')
+    location = sensor_data.get('location', 'Unknown')
+    
+    display = {
+        'timestamp_indo': f"{dt.day} {_MONTHS_INDO[dt.month]} {dt.year}",
+        'crop_icon': _CROP_ICONS.get(crop, '🌱'),
+        'crop_display': _clip(crop.replace('_', ' ').title(), _CROP_DISPLAY_MAX),
+        'location_short': _clip(location.partition(',')[0], _LOCATION_DISPLAY_MAX),
+        'badge_html': _build_badge_html(interaction)
+    }
+    # Both card variants are rendered up front so a rerender only picks one
+    display['html_active'], display['html_inactive'] = _render_card_html(
+        display['crop_icon'], display['crop_display'],
+        display['location_short'], display['timestamp_indo'], display['badge_html']
+    )
+    interaction['_display'] = display
+    return display
+
+
+def add_interaction_to_history(interaction_data: Dict[str, Any]):
+    """Append a new interaction to session history and make it the current one
+    
+    History is kept in insertion order (oldest first); new interactions always
+    carry the latest timestamp, so the list stays sorted without re-sorting.
+    """
+    build_interaction_display(interaction_data)
+    
+    if 'interaction_history' not in st.session_state:
+        st.session_state.interaction_history = []
+    
+    history = st.session_state.interaction_history
+    index = _get_interaction_index()
+    history.append(interaction_data)
+    index[interaction_data['id']] = interaction_data
+    
+    # Keep only the most recent interactions; trimmed in place so the index stays valid
+    overflow = len(history) - MAX_SESSION_INTERACTIONS
+    if overflow > 0:
+        for dropped in history[:overflow]:
+            index.pop(dropped['id'], None)
+        del history[:overflow]
+    
+    _bump_history_version()
+    st.session_state.current_interaction_id = interaction_data['id']
+
+
+def remove_interaction_from_history(interaction_id: str) -> Optional[Dict[str, Any]]:
+    """Remove an interaction from session history by id and return it (None if absent)
+    
+    The id index finds the record directly and the list is edited in place, so the
+    index and the list-keyed view caches stay valid instead of being rebuilt.
+    """
+    history = st.session_state.get('interaction_history', [])
+    index = _get_interaction_index()
+    interaction = index.pop(interaction_id, None)
+    if interaction is None:
+        return None
+    
+    # Identity match: the indexed record is the very object stored in the list
+    for position, candidate in enumerate(history):
+        if candidate is interaction:
+            del history[position]
+            break
+    
+    _bump_history_version()
+    return interaction
+
+
+def _get_interaction_index() -> Dict[str, Dict[str, Any]]:
+    """Get the id -> interaction lookup for the current session history
+    
+    The index is stored together with the history list it was built from and is
+    rebuilt whenever that list is replaced (DB reload) or changes size
+    outside add_interaction_to_history.
+    """
+    history = st.session_state.get('interaction_history', [])
+    cached = st.session_state.get('interaction_index')
+    if cached is not None:
+        owner, index = cached
+        if owner is history and len(index) == len(history):
+            return index
+    
+    index = {interaction['id']: interaction for interaction in history}
+    st.session_state.interaction_index = (history, index)
+    return index
+
+# ==================== HISTORY PANEL ====================
+
+def _bump_history_version():
+    """Mark session history as changed so cached views of it are rebuilt"""
+    st.session_state.history_version = st.session_state.get('history_version', 0) + 1
+
+
+def _get_newest_first(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get the newest-first view of session history, reused until history changes
+    
+    The view is keyed on the history list itself (replaced on DB reload) and on
+    history_version (bumped on append, trim, deletion and result updates).
+    """
+    version = st.session_state.get('history_version', 0)
+    cached = st.session_state.get('history_newest_first')
+    if cached is not None:
+        owner, cached_version, newest_first = cached
+        if owner is history and cached_version == version:
+            return newest_first
+    
+    # History is kept oldest-first (see add_interaction_to_history), so newest first is a reverse copy
+    newest_first = history[::-1]
+    st.session_state.history_newest_first = (history, version, newest_first)
+    return newest_first
+
+
+def _render_history_cards(interactions, current_id) -> str:
+    """Render history cards (with badges) into one HTML blob, in the given order"""
+    parts = []
+    for interaction in interactions:
+        # Display strings are cached on the record; legacy records are filled in once here
+        display = interaction.get('_display') or build_interaction_display(interaction)
+        
+        # Nothing is active while a new analysis is being entered
+        is_active = current_id is not None and interaction['id'] == current_id
+        
+        # Card (with its confidence badge) is prerendered with the display strings
+        parts.append(display['html_active'] if is_active else display['html_inactive'])
+    
+    return "".join(parts)
+
+
+def _get_history_html(history: List[Dict[str, Any]], current_id, visible: int) -> Tuple[str, int]:
+    """Get the sidebar HTML for the newest `visible` cards and the count left out
+    
+    Most reruns come from widgets elsewhere on the page; when the history list,
+    history_version, current interaction and page size are unchanged, the last
+    HTML is replayed.
+    """
+    version = st.session_state.get('history_version', 0)
+    key = (version, current_id, visible)
+    cached = st.session_state.get('history_html')
+    if cached is not None:
+        owner, cached_key, rendered = cached
+        if owner is history and cached_key == key:
+            return rendered
+    
+    sorted_history = _get_newest_first(history)
+    rendered = (
+        _render_history_cards(sorted_history[:visible], current_id),
+        max(len(sorted_history) - visible, 0)
+    )
+    st.session_state.history_html = (history, key, rendered)
+    return rendered
+
+
+def _history_option_label(interaction_id: str, index: Dict[str, Dict[str, Any]]) -> str:
+    """Label for an interaction in the history selector, built from its cached display strings"""
+    interaction = index[interaction_id]
+    display = interaction.get('_display') or build_interaction_display(interaction)
+    return f"{display['crop_icon']} {display['crop_display']} - {display['location_short']} ({display['timestamp_indo']})"
+
 
 def display_interaction_history():
     """Display interaction history in sidebar - matches original implementation"""
     with st.sidebar:
-        
-        if not st.session_state.interaction_history:
-            st.info("Belum ada interaksi tersimpan")
-            st.markdown("*Gunakan **➕ New** untuk membuat preset atau input manual*")
-            return
-        
-        # Show total count with summary
-        total = len(st.session_state.interaction_history)
-        if total == 1:
-            st.caption(f"Total: {total} interaction")
-        else:
-            st.caption(f"Total: {total} interactions")
-        
-        # Sort by timestamp (newest first)
-        sorted_history = sorted(st.session_state.interaction_history, 
-                               key=lambda x: x['timestamp'], reverse=True)
-        
-        for i, interaction in enumerate(sorted_history):
-            timestamp = interaction['timestamp'].strftime("%d/%m")
-            time_only = interaction['timestamp'].strftime("%H:%M")
-            
-            # Convert to Indonesian date format
-            months_indo = {
-                1: 'Januari', 2: 'Februari', 3: 'Maret', 4: 'April',
-                5: 'Mei', 6: 'Juni', 7: 'Juli', 8: 'Agustus',
-                9: 'September', 10: 'Oktober', 11: 'November', 12: 'Desember'
-            }
-            dt = interaction['timestamp']
-            timestamp_indo = f"{dt.day} {months_indo[dt.month]} {dt.year}"
-            
-            sensor_data = interaction['sensor_data']
-            
-            # Get crop info with icon
-            crop = sensor_data.get('selected_crop', 'unknown')
-            crop_icons = {
-                'rice': '🌾', 'maize': '🌽', 'cotton': '🏭', 'banana': '🍌',
-                'mango': '🥭', 'orange': '🍊', 'coffee': '☕', 'pomegranate': '🍇',
-                'watermelon': '🍉', 'chickpea': '🫘', 'kidneybeans': '🫘',
-                'lentil': '🫘', 'blackgram': '🫘', 'mungbean': '🫘',
-                'pigeonpeas': '🫘', 'mothbeans': '🫘', 'papaya': '🍈',
-                'jute': '🌿', 'muskmelon': '🍈'
-            }
-            crop_icon = crop_icons.get(crop, '🌱')
-            crop_display = crop.replace('_', ' ').title()
-            
-            # Get location (simplified)
-            location = sensor_data.get('location', 'Unknown')
-            location_short = location.split(',')[0] if ',' in location else location
-            
-            # Create interactive card button
-            is_active = interaction['id'] == st.session_state.current_interaction_id
-            
-            if is_active:
-                # Active card with improved spacing
-                st.markdown(f"""
-                <div style="
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    border-radius: 10px;
-                    padding: 12px 14px;
-                    margin: 6px 0;
-                    color: white;
-                    box-shadow: 0 2px 8px rgba(102, 126, 234, 0.3);
-                    border: 1px solid #667eea;
-                ">
-                    <div style="display: flex; align-items: center; justify-content: space-between;">
-                        <div style="display: flex; align-items: center; gap: 10px;">
-                            <span style="font-size: 18px;">{crop_icon}</span>
-                            <div>
-                                <div style="font-weight: bold; font-size: 14px; line-height: 1.3; margin-bottom: 3px;">
-                                    {crop_display}
-                                </div>
-                                <div style="font-size: 11px; opacity: 0.85; line-height: 1.2;">
-                                    {location_short} - {timestamp_indo}
-                                </div>
-                            </div>
-                        </div>
-                        <span style="font-size: 10px; opacity: 0.9;">🟢</span>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                # Interactive card button with improved spacing
-                card_html = f"""
-                <div style="
-                    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-                    border-radius: 10px;
-                    padding: 12px 14px;
-                    margin: 6px 0;
-                    color: #2c3e50;
-                    border: 1px solid #e0e6ed;
-                    box-shadow: 0 1px 6px rgba(0,0,0,0.05);
-                ">
-                    <div style="display: flex; align-items: center; justify-content: space-between;">
-                        <div style="display: flex; align-items: center; gap: 10px; flex: 1; min-width: 0;">
-                            <span style="font-size: 18px;">{crop_icon}</span>
-                            <div style="flex: 1; min-width: 0;">
-                                <div style="font-weight: bold; font-size: 14px; line-height: 1.3; color: #2c3e50; margin-bottom: 3px;">
-                                    {crop_display}
-                                </div>
-                                <div style="font-size: 11px; color: #34495e; line-height: 1.2;">
-                                    {location_short} - {timestamp_indo}
-                                </div>
-                            </div>
-                        </div>
-                        <span style="font-size: 11px; color: #7f8c8d;">🔄</span>
-                    </div>
-                </div>
-                """
-                
-                # Non-clickable card
-                st.markdown(card_html, unsafe_allow_html=True)
-            
-            # Add confidence badge if available
-            if interaction.get('ml_result') and interaction['ml_result'].get('confidence'):
-                confidence = interaction['ml_result']['confidence'] * 100
-                if confidence >= 70:
-                    badge_color = "#27ae60"
-                    badge_text = "HIGH"
-                elif confidence >= 50:
-                    badge_color = "#f39c12"
-                    badge_text = "MED"
-                else:
-                    badge_color = "#e74c3c"
-                    badge_text = "LOW"
-                
-                # Use same column layout for badge alignment
-                badge_col1, badge_col2 = st.columns([8, 2])
-                with badge_col1:
-                    st.markdown(f"""
-                    <div style="
-                        background: {badge_color};
-                        color: white;
-                        padding: 2px 6px;
-                        border-radius: 8px;
-                        font-size: 9px;
-                        font-weight: bold;
-                        text-align: center;
-                        margin: -2px 0 8px 0;
-                        display: inline-block;
-                    ">
-                        🤖 {badge_text} ({confidence:.0f}%)
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                # Add spacing when no confidence badge
-                st.markdown("<div style='margin-bottom: 4px;'></div>", unsafe_allow_html=True)
+        _interaction_history_fragment()
 
 
+@st.fragment
+def _interaction_history_fragment():
+    """History panel body; paging through history reruns only this fragment"""
+    history = st.session_state.interaction_history
+    current_id = st.session_state.current_interaction_id
+    
+    if not history:
+        st.info(_EMPTY_HISTORY_INFO)
+        st.markdown(_EMPTY_HISTORY_HINT_MD)
+        return
+    
+    # Show total count with summary
+    total = len(history)
+    st.caption(f"Total: {total} {_INTERACTION_NOUN[total != 1]}")
+    
+    # One selector opens any interaction, instead of a button per card
+    sorted_history = _get_newest_first(history)
+    options = list(map(itemgetter('id'), sorted_history))
+    index = _get_interaction_index()
+    selected_id = st.selectbox(
+        "📂 Buka interaksi",
+        options,
+        index=options.index(current_id) if current_id in index else None,
+        # Bind the index once instead of going through session state for every option
+        format_func=partial(_history_option_label, index=index),
+        placeholder="Pilih interaksi dari riwayat"
+    )
+    if selected_id is not None and selected_id != current_id:
+        st.session_state.current_interaction_id = selected_id
+        restore_location_from_interaction(index[selected_id])
+        st.rerun()
+    
+    # Only a page of the most recent cards is rendered; older ones load on demand
+    visible = st.session_state.get('history_visible_count', HISTORY_VISIBLE_CARDS)
+    history_html, remaining = _get_history_html(history, current_id, visible)
+    st.markdown(_HISTORY_CSS + history_html, unsafe_allow_html=True)
+    
+    if remaining:
+        if st.button(f"Show {min(remaining, HISTORY_VISIBLE_CARDS)} more", key="history_show_more"):
+            st.session_state.history_visible_count = visible + HISTORY_VISIBLE_CARDS
+            st.rerun(scope="fragment")
+
 
 def restore_location_from_interaction(interaction_data):
     """Restore location data to session state from loaded interaction"""
     if not interaction_data:
-        print("⚠️ No interaction data to restore location from")
+        logger.debug("No interaction data to restore location from")
         return
     
-    sensor_data = interaction_data.get('sensor_data', {})
+    sensor_data = interaction_data.get('sensor_data') or {}
     coordinates = sensor_data.get('coordinates')
     location = sensor_data.get('location')
     location_source = sensor_data.get('location_source', 'unknown')
     
-    print(f"🔄 Restoring location from interaction:")
-    print(f"  📍 Location: {location}")
-    print(f"  🌍 Coordinates: {coordinates}")
-    print(f"  📊 Source: {location_source}")
+    if not (coordinates and location):
+        logger.debug("Incomplete location data - coordinates: %s, location: %s",
+                     bool(coordinates), bool(location))
+        return
     
-    if coordinates and location:
+    logger.debug("Restoring location from interaction: %s %s (source: %s)",
+                 location, coordinates, location_source)
+    
+    # Collect all restored fields and apply them to session state in one update
+    updates = {
         # Restore to session state for map display and form usage
-        st.session_state.selected_location = {
+        'selected_location': {
             'coordinates': coordinates,
             'address': location,
             'source': location_source
-        }
-        
+        },
         # Also restore temp_coordinates for form integration
-        st.session_state.temp_coordinates = coordinates
-        
-        # If it's from map click, also restore to pin state for map display
-        if location_source == 'map_click_with_red_pin':
-            st.session_state.selected_location_pin = {
-                'lat': coordinates['lat'],
-                'lng': coordinates['lng'],
-                'address': location,
-                'timestamp': 1  # Single pin mode
-            }
-            # Force map refresh to show restored pin
-            st.session_state.map_refresh_counter = st.session_state.get('map_refresh_counter', 0) + 1
-        else:
-            # Clear pin state for non-map sources
-            st.session_state.selected_location_pin = None
-        
-        # If it's from GPS, also restore to GPS session state
-        if location_source == 'gps':
-            # Extract GPS-specific data if available
-            gps_accuracy = sensor_data.get('gps_accuracy', 10)  # Default accuracy
-            st.session_state.gps_location_data = {
-                'lat': coordinates['lat'],
-                'lng': coordinates['lng'],
-                'address': location,
-                'accuracy': gps_accuracy,
-                'timestamp': datetime.now().isoformat()  # Current timestamp for restored data
-            }
-            st.session_state.gps_permission_requested = True  # Mark as GPS already used
-            print(f"✅ GPS location data restored with accuracy: {gps_accuracy}m")
-        
-        print(f"✅ Location restored successfully from {location_source}")
-    else:
-        print(f"⚠️ Incomplete location data - coordinates: {bool(coordinates)}, location: {bool(location)}")
+        'temp_coordinates': coordinates,
+        # Clear pin state for non-map sources (replaced below for map clicks)
+        'selected_location_pin': None
+    }
+    
+    # If it's from map click, also restore to pin state for map display
+    if location_source == 'map_click_with_red_pin':
+        updates['selected_location_pin'] = {
+            'lat': coordinates['lat'],
+            'lng': coordinates['lng'],
+            'address': location,
+            'timestamp': 1  # Single pin mode
+        }
+        # Force map refresh to show restored pin
+        updates['map_refresh_counter'] = st.session_state.get('map_refresh_counter', 0) + 1
+    
+    # If it's from GPS, also restore to GPS session state
+    elif location_source == 'gps':
+        # Extract GPS-specific data if available
+        gps_accuracy = sensor_data.get('gps_accuracy') or 10  # Default accuracy
+        updates['gps_location_data'] = {
+            'lat': coordinates['lat'],
+            'lng': coordinates['lng'],
+            'address': location,
+            'accuracy': gps_accuracy,
+            # Reuse the stored fix time; older records fall back to the restore time
+            'timestamp': sensor_data.get('gps_timestamp') or datetime.now().isoformat(timespec='seconds')
+        }
+        updates['gps_permission_requested'] = True  # Mark as GPS already used
+        logger.debug("GPS location data restored with accuracy: %sm", gps_accuracy)
+    
+    st.session_state.update(updates)
+    logger.debug("Location restored successfully from %s", location_source)
 
 
 def load_interaction(interaction_id):
     """Load interaction from history"""
-    for interaction in st.session_state.interaction_history:
-        if interaction['id'] == interaction_id:
-            return interaction
-    return None
+    return _get_interaction_index().get(interaction_id)
 
 
 def get_current_interaction_data():
@@ -237,19 +444,17 @@ def get_current_interaction_data():
 
 def update_interaction_results(interaction_id, ml_result=None, ai_result=None):
     """Update interaction with ML and AI results in both session state and MongoDB"""
-    # Import here to avoid circular imports
-    from src.services.database import get_mongodb_manager
-    
     # Update session state
-    for i, interaction in enumerate(st.session_state.interaction_history):
-        if interaction['id'] == interaction_id:
-            if ml_result:
-                st.session_state.interaction_history[i]['ml_result'] = ml_result
-            if ai_result:
-                st.session_state.interaction_history[i]['ai_result'] = ai_result
-            break
+    interaction = _get_interaction_index().get(interaction_id)
+    if interaction is not None:
+        if ml_result:
+            interaction['ml_result'] = ml_result
+            # Re-render the cached card so its confidence badge matches the new result
+            build_interaction_display(interaction)
+        if ai_result:
+            interaction['ai_result'] = ai_result
+        _bump_history_version()
     
-    # Update MongoDB
-    mongo_manager = get_mongodb_manager()
-    if mongo_manager.is_connected():
-        mongo_manager.update_interaction_results(interaction_id, ml_result, ai_result) 
\ No newline at end of file
+    # Update MongoDB without blocking the rerun on the round-trip
+    if get_mongodb_manager().is_connected():
+        update_interaction_results_in_background(interaction_id, ml_result, ai_result) 
\ No newline at end of file
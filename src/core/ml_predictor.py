@@ -3,11 +3,15 @@ ML Predictor Core Module for Agricultural Decision Support System
 Contains AI Crop Predictor class and related ML functionality.
 """
 
+import gc
 import os
 import pickle
-import pandas as pd
+import threading
 import numpy as np
-from typing import Dict, Tuple, Any, Optional, List
+import streamlit as st
+from dataclasses import dataclass
+from functools import cached_property, lru_cache, partial
+from typing import Dict, Tuple, Any, Optional, List, Union, Callable
 
 
 
@@ -22,27 +26,155 @@ try:
 except ImportError:
     SHAP_AVAILABLE = False
 
+# Base sensor inputs and their quantization (0.1 units) for the prediction cache
+_BASE_PARAMS = ('nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall')
+_CACHE_QUANTUM = 10
+_PREDICTION_CACHE_SIZE = 1024
+
+# Optional ONNX Runtime import (compiled forest inference)
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Optional Numba import (compiled feature engineering)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _engineer_kernel(features):
+        """Fill derived columns 7-13 from base columns 0-6, row by row in place"""
+        for i in range(features.shape[0]):
+            n, p, k = features[i, 0], features[i, 1], features[i, 2]
+            t, h, ph, r = features[i, 3], features[i, 4], features[i, 5], features[i, 6]
+            features[i, 7] = n + p + k
+            features[i, 8] = n / (p + 1e-6)
+            features[i, 9] = n / (k + 1e-6)
+            features[i, 10] = p / (k + 1e-6)
+            features[i, 11] = t * h
+            features[i, 12] = r / (h + 1e-6)
+            features[i, 13] = 1 + (ph >= 6.5) + (ph > 7.5)
+    
+    # Compile once at import so the first prediction doesn't pay for it
+    _engineer_kernel(np.zeros((1, 14), dtype=np.float32))
+
+# ==================== EVALUATION RESULT ====================
+
+@dataclass
+class CropEvaluation:
+    """Suitability result whose explanation (SHAP) is only computed when read.
+
+    Still unpacks and indexes like the old (recommendation, confidence, explanation) tuple.
+    """
+    recommendation: str
+    confidence: float
+    explain: Callable[[], str]
+    
+    @cached_property
+    def explanation(self) -> str:
+        return self.explain()
+    
+    def __iter__(self):
+        yield self.recommendation
+        yield self.confidence
+        yield self.explanation
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        if not -3 <= index < 3:
+            raise IndexError("CropEvaluation index out of range")
+        # Only index 2 (or -1) builds the explanation
+        index %= 3
+        if index == 2:
+            return self.explanation
+        return (self.recommendation, self.confidence)[index]
+
+
+def _error_evaluation(message: str) -> CropEvaluation:
+    """Evaluation result for a failed prediction"""
+    return CropEvaluation("Error", 0.0, partial(str, message))
+
 # ==================== AI CROP PREDICTOR CLASS ====================
 
 class AICropPredictor:
     """AI-powered crop prediction system with SHAP explainability."""
     
+    # Model input columns, in the order produced by engineer_features
+    _FEATURE_NAMES = (
+        'N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall',
+        'NPK_sum', 'NP_ratio', 'NK_ratio', 'PK_ratio',
+        'temp_humidity_interaction', 'rainfall_humidity_ratio', 'ph_acidity_level'
+    )
+    
+    # Sensor parameter each feature is explained through (engineered features use their leading input)
+    _FEATURE_TO_PARAM = {
+        'N': 'nitrogen',
+        'P': 'phosphorus',
+        'K': 'potassium',
+        'temperature': 'temperature',
+        'humidity': 'humidity',
+        'ph': 'ph',
+        'rainfall': 'rainfall',
+        'NPK_sum': 'nitrogen',
+        'NP_ratio': 'nitrogen',
+        'NK_ratio': 'nitrogen',
+        'PK_ratio': 'phosphorus',
+        'temp_humidity_interaction': 'temperature',
+        'rainfall_humidity_ratio': 'rainfall',
+        'ph_acidity_level': 'ph'
+    }
+    
+    # Sensor ranges for the simple explanation, built once from SENSOR_PARAMS
+    _PARAM_INDEX = {param: i for i, param in enumerate(SENSOR_PARAMS)}
+    _PARAM_MINS = np.array([spec.min for spec in SENSOR_PARAMS.values()])
+    _PARAM_SPANS = np.array([spec.max - spec.min for spec in SENSOR_PARAMS.values()])
+    
     def __init__(self, model_path: str = None):
         """Initialize the AI Crop Predictor"""
         self.model_path = model_path or ML_CONFIG['model_path']
         self.model = None
         self.label_encoder = None
         self.scaler = None
-        self.explainer = None
+        self._explainer = None
+        self._explainer_failed = False
+        self._explainer_lock = threading.RLock()
+        self._explainer_timer = None
         self.training_data = None
+        self._crop_to_idx = {}
+        self.onnx_session = None
+        self._scale_mul = None
+        self._scale_add = None
+        self._predict_cached = lru_cache(maxsize=_PREDICTION_CACHE_SIZE)(self._predict_quantized)
         
         # Load models on initialization
+        # (the SHAP explainer is built lazily on first use)
         self.load_models()
-        if SHAP_AVAILABLE:
-            self.initialize_explainer()
+        self.warm_up()
+    
+    def warm_up(self):
+        """Run one dummy prediction so lazy model setup isn't paid by the first real request
+        
+        Only the prediction path is exercised; the SHAP explainer stays unbuilt until an
+        explanation is actually read.
+        """
+        if not self.is_model_loaded():
+            return
+        
+        try:
+            sample = {param: spec.default for param, spec in SENSOR_PARAMS.items()}
+            self._predict_probabilities([sample])
+        except Exception as e:
+            print(f"⚠️ Model warm-up failed: {str(e)}")
     
     def load_models(self):
         """Load the trained models"""
+        self._predict_cached.cache_clear()
         try:
             model_files = ML_CONFIG['models']
             
@@ -55,11 +187,16 @@ class AICropPredictor:
             encoder_file = os.path.join(self.model_path, model_files['label_encoder'])
             with open(encoder_file, 'rb') as f:
                 self.label_encoder = pickle.load(f)
+            self._crop_to_idx = {crop: idx for idx, crop in enumerate(self.label_encoder.classes_)}
             
             # Load Scaler
             scaler_file = os.path.join(self.model_path, model_files['scaler'])
             with open(scaler_file, 'rb') as f:
                 self.scaler = pickle.load(f)
+            self._extract_scaler_constants()
+            
+            if ONNX_AVAILABLE:
+                self.load_onnx_session()
             
             print("✅ ML models loaded successfully")
             return True
@@ -71,24 +208,134 @@ class AICropPredictor:
             handle_error('model_loading_failed', f"Error loading models: {str(e)}")
             return False
     
+    def _extract_scaler_constants(self):
+        """Reduce a Standard/MinMax scaler to x * mul + add so predictions skip sklearn validation"""
+        self._scale_mul = self._scale_add = None
+        
+        if hasattr(self.scaler, 'data_min_'):  # MinMaxScaler
+            if not getattr(self.scaler, 'clip', False):
+                self._scale_mul = np.asarray(self.scaler.scale_, dtype=np.float32)
+                self._scale_add = np.asarray(self.scaler.min_, dtype=np.float32)
+        elif hasattr(self.scaler, 'mean_') or hasattr(self.scaler, 'var_'):  # StandardScaler
+            # Mirror transform: mean_ is still fitted when with_mean=False, but not subtracted
+            n_features = len(self._FEATURE_NAMES)
+            use_std = getattr(self.scaler, 'with_std', True) and self.scaler.scale_ is not None
+            use_mean = getattr(self.scaler, 'with_mean', True) and self.scaler.mean_ is not None
+            scale = self.scaler.scale_ if use_std else np.ones(n_features)
+            mean = self.scaler.mean_ if use_mean else np.zeros(n_features)
+            self._scale_mul = (1.0 / np.asarray(scale, dtype=float)).astype(np.float32)
+            self._scale_add = (-np.asarray(mean, dtype=float) / np.asarray(scale, dtype=float)).astype(np.float32)
+    
+    def load_onnx_session(self):
+        """Load the ONNX export of the forest, if one has been generated and matches the loaded model"""
+        self.onnx_session = None
+        onnx_file = os.path.join(self.model_path, ML_CONFIG['models']['onnx_model'])
+        if not os.path.exists(onnx_file):
+            return
+        
+        try:
+            session = ort.InferenceSession(onnx_file, providers=['CPUExecutionProvider'])
+            
+            # The export can go stale after a retrain; only serve it if it agrees with the loaded model
+            probes = self.engineer_features([
+                {param: getattr(spec, field) for param, spec in SENSOR_PARAMS.items()}
+                for field in ('min', 'default', 'max')
+            ])
+            onnx_probabilities = session.run(['probabilities'], {'input': probes})[0]
+            if not np.allclose(onnx_probabilities, self.model.predict_proba(self._scale(probes)), atol=1e-4):
+                print("⚠️ ONNX model does not match the loaded scikit-learn model (stale export?), using scikit-learn")
+                return
+            
+            self.onnx_session = session
+            print("✅ ONNX inference session loaded")
+        except Exception as e:
+            print(f"⚠️ Error loading ONNX model, using scikit-learn: {str(e)}")
+    
+    def export_onnx_model(self) -> Optional[str]:
+        """Convert scaler + Random Forest into one fused ONNX graph (offline step, requires skl2onnx)"""
+        if not self.model or not self.scaler:
+            return None
+        
+        try:
+            from sklearn.pipeline import Pipeline
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+            
+            # The graph takes engineered (unscaled) features, so scaling runs inside ONNX Runtime
+            onnx_model = convert_sklearn(
+                Pipeline([('scaler', self.scaler), ('model', self.model)]),
+                initial_types=[('input', FloatTensorType([None, len(self._FEATURE_NAMES)]))],
+                options={type(self.model): {'zipmap': False}}
+            )
+            onnx_file = os.path.join(self.model_path, ML_CONFIG['models']['onnx_model'])
+            with open(onnx_file, 'wb') as f:
+                f.write(onnx_model.SerializeToString())
+            
+            print(f"✅ ONNX model exported to {onnx_file}")
+            return onnx_file
+            
+        except Exception as e:
+            print(f"⚠️ Error exporting ONNX model: {str(e)}")
+            return None
+    
+    def _predict_proba(self, engineered_data: np.ndarray) -> np.ndarray:
+        """Class probabilities for engineered feature rows from ONNX Runtime or scikit-learn"""
+        if self.onnx_session is not None:
+            # Fused graph: scaling and forest in a single run call
+            return self.onnx_session.run(['probabilities'], {'input': engineered_data})[0]
+        return self.model.predict_proba(self._scale(engineered_data))
+    
+    @property
+    def explainer(self):
+        """SHAP explainer, built on first access and released again after an idle period"""
+        if not SHAP_AVAILABLE:
+            return None
+        
+        with self._explainer_lock:
+            if self._explainer is None and not self._explainer_failed:
+                self.initialize_explainer()
+            if self._explainer is not None:
+                self._schedule_explainer_release()
+            return self._explainer
+    
+    def _schedule_explainer_release(self):
+        """(Re)start the idle timer that frees the explainer"""
+        timeout = ML_CONFIG['explainer_idle_timeout']
+        if timeout <= 0:
+            return
+        
+        if self._explainer_timer is not None:
+            self._explainer_timer.cancel()
+        self._explainer_timer = threading.Timer(timeout, self.release_explainer)
+        self._explainer_timer.daemon = True
+        self._explainer_timer.start()
+    
+    def release_explainer(self):
+        """Free the SHAP explainer; it is rebuilt on next use"""
+        with self._explainer_lock:
+            if self._explainer_timer is not None:
+                self._explainer_timer.cancel()
+                self._explainer_timer = None
+            if self._explainer is None:
+                return
+            self._explainer = None
+        
+        gc.collect()
+        print("🧹 SHAP explainer released")
+    
     def initialize_explainer(self):
         """Initialize SHAP explainer for model interpretability"""
         if not SHAP_AVAILABLE or not self.model:
             return
-            
+        
+        # Stays set unless the explainer is built, so a failing build isn't retried on every access
+        self._explainer_failed = True
+        
         try:
-            # Load training data for background
-            training_files = ML_CONFIG['training_data']
-            X_train_file = os.path.join(self.model_path, training_files['X_train'])
-            
-            if os.path.exists(X_train_file):
-                X_train = pd.read_csv(X_train_file)
-                
-                # Create SHAP explainer with background data
-                self.explainer = shap.TreeExplainer(self.model, X_train.sample(min(100, len(X_train))))
-                print("✅ SHAP explainer initialized")
-            else:
-                print("⚠️ Training data not found for SHAP explainer")
+            # Path-dependent SHAP uses the trees' own cover statistics, so no background data is needed
+            self._explainer = shap.TreeExplainer(self.model, feature_perturbation='tree_path_dependent')
+            self._explainer_failed = False
+            print("✅ SHAP explainer initialized")
                 
         except Exception as e:
             print(f"⚠️ Error initializing SHAP explainer: {str(e)}")
@@ -96,16 +343,18 @@ class AICropPredictor:
     def get_feature_explanation(self, input_data: Dict[str, float], selected_crop: str, confidence: float) -> str:
         """Generate feature importance explanation using SHAP"""
         
-        if not SHAP_AVAILABLE or not self.explainer:
+        explainer = self.explainer
+        if explainer is None:
             return self._generate_simple_explanation(input_data, selected_crop, confidence)
         
         try:
             # Prepare data for SHAP
-            engineered_data = self.engineer_features(input_data)
-            scaled_data = self.scaler.transform(engineered_data)
+            scaled_data = self.preprocess_input(input_data)
             
             # Get SHAP values
-            shap_values = self.explainer.shap_values(scaled_data)
+            shap_values = explainer.shap_values(
+                scaled_data.astype(np.float32, copy=False), approximate=True, check_additivity=False
+            )
             
             # Handle different SHAP value formats properly
             # For RandomForest multi-class: shap_values is list of arrays [class1_shap, class2_shap, ...]
@@ -116,9 +365,8 @@ class AICropPredictor:
             if isinstance(shap_values, list):
                 # Multi-class classification - get SHAP values for target crop
                 if len(shap_values) > 1:
-                    crop_classes = self.label_encoder.classes_
-                    if selected_crop in crop_classes:
-                        crop_index = list(crop_classes).index(selected_crop)
+                    crop_index = self._crop_to_idx.get(selected_crop)
+                    if crop_index is not None:
                         if crop_index < len(shap_values):
                             final_shap_values = shap_values[crop_index]
                         else:
@@ -139,10 +387,9 @@ class AICropPredictor:
                 # Handle different SHAP value structures intelligently
                 if len(final_shap_values.shape) == 3:
                     # Shape is (n_samples, n_features, n_classes) - extract for target crop
-                    crop_classes = self.label_encoder.classes_
+                    crop_index = self._crop_to_idx.get(selected_crop)
                     
-                    if selected_crop in crop_classes:
-                        crop_index = list(crop_classes).index(selected_crop)
+                    if crop_index is not None:
                         # Take first sample, all features, target crop class
                         final_shap_values = final_shap_values[0, :, crop_index]
                     else:
@@ -151,7 +398,7 @@ class AICropPredictor:
                 
                 elif len(final_shap_values.shape) == 2:
                     # Shape is (n_features, n_samples) or (n_samples, n_features)
-                    n_features = len(engineered_data.columns)
+                    n_features = len(self._FEATURE_NAMES)
                     
                     if final_shap_values.shape[0] == n_features:
                         # Shape is (n_features, n_samples) - take first sample
@@ -168,12 +415,12 @@ class AICropPredictor:
                     return self._generate_simple_explanation(input_data, selected_crop, confidence)
                 
                 # Final validation
-                if len(final_shap_values) != len(engineered_data.columns):
-                    print(f"⚠️ Dimension mismatch: {len(final_shap_values)} SHAP values vs {len(engineered_data.columns)} features")
+                if len(final_shap_values) != len(self._FEATURE_NAMES):
+                    print(f"⚠️ Dimension mismatch: {len(final_shap_values)} SHAP values vs {len(self._FEATURE_NAMES)} features")
                     return self._generate_simple_explanation(input_data, selected_crop, confidence)
                 
                 # Create feature importance dictionary
-                feature_importance = dict(zip(engineered_data.columns, final_shap_values))
+                feature_importance = dict(zip(self._FEATURE_NAMES, final_shap_values))
                 
                 # Generate explanation
                 return self._generate_shap_explanation(feature_importance, input_data, selected_crop, confidence)
@@ -191,25 +438,19 @@ class AICropPredictor:
     def _generate_simple_explanation(self, input_data: Dict[str, float], selected_crop: str, confidence: float) -> str:
         """Generate simple explanation without SHAP"""
         
-        explanations = []
+        # Analyze all known parameters at once
+        params = [param for param in input_data if param in self._PARAM_INDEX]
+        indices = np.fromiter((self._PARAM_INDEX[param] for param in params), dtype=np.intp, count=len(params))
+        values = np.fromiter((input_data[param] for param in params), dtype=float, count=len(params))
         
-        # Analyze each parameter
-        for param, value in input_data.items():
-            if param in SENSOR_PARAMS:
-                param_config = SENSOR_PARAMS[param]
-                param_range = param_config['max'] - param_config['min']
-                
-                # Calculate relative position (0-1)
-                relative_pos = (value - param_config['min']) / param_range
-                
-                if relative_pos < 0.3:
-                    level = "rendah"
-                elif relative_pos > 0.7:
-                    level = "tinggi"
-                else:
-                    level = "sedang"
-                
-                explanations.append(f"• {param.title()}: {value} {param_config['unit']} ({level})")
+        # Relative position (0-1) within each sensor range
+        relative_pos = (values - self._PARAM_MINS[indices]) / self._PARAM_SPANS[indices]
+        levels = np.select([relative_pos < 0.3, relative_pos > 0.7], ["rendah", "tinggi"], default="sedang")
+        
+        explanations = [
+            f"• {param.title()}: {input_data[param]} {SENSOR_PARAMS[param].unit} ({level})"
+            for param, level in zip(params, levels)
+        ]
         
         confidence_text = format_confidence_score(confidence)
         
@@ -269,7 +510,7 @@ class AICropPredictor:
                     impact = "mendukung" if importance > 0 else "menghambat"
                     strength = "sangat" if abs(importance) > 0.1 else "cukup"
                     
-                    unit = SENSOR_PARAMS.get(original_param, {}).get('unit', '')
+                    unit = SENSOR_PARAMS[original_param].unit if original_param in SENSOR_PARAMS else ''
                     explanations.append(f"• {original_param.title()}: {value} {unit} - {strength} {impact}")
             
             # Fallback if no valid explanations generated
@@ -299,155 +540,161 @@ class AICropPredictor:
     
     def _map_feature_to_param(self, feature_name: str) -> str:
         """Map engineered feature back to original parameter"""
+        return self._FEATURE_TO_PARAM.get(feature_name, feature_name)
+    
+    def engineer_features(self, input_data: Union[Dict[str, float], List[Dict[str, float]]]) -> np.ndarray:
+        """Engineer features from one input dict or a list of them - matches original model training from EDA.ipynb"""
         
-        # Simple mapping for basic features
-        param_mapping = {
-            'N': 'nitrogen',
-            'P': 'phosphorus', 
-            'K': 'potassium',
-            'temperature': 'temperature',
-            'humidity': 'humidity',
-            'ph': 'ph',
-            'rainfall': 'rainfall'
-        }
+        samples = [input_data] if isinstance(input_data, dict) else input_data
         
-        # Check for direct match
-        if feature_name in param_mapping:
-            return param_mapping[feature_name]
-        
-        # Check for partial match (for engineered features)
-        for orig_name, param in param_mapping.items():
-            if orig_name.lower() in feature_name.lower():
-                return param
-        
-        return feature_name  # Return as is if no mapping found
-    
-    def engineer_features(self, input_data: Dict[str, float]) -> pd.DataFrame:
-        """Engineer features from input data - matches original model training from EDA.ipynb"""
-        
-        # Extract base features (original scale)
-        N = safe_float(input_data.get('nitrogen', 0))
-        P = safe_float(input_data.get('phosphorus', 0))
-        K = safe_float(input_data.get('potassium', 0))
-        temperature = safe_float(input_data.get('temperature', 0))
-        humidity = safe_float(input_data.get('humidity', 0))
-        ph = safe_float(input_data.get('ph', 0))
-        rainfall = safe_float(input_data.get('rainfall', 0))
-        
-        # Create features in exact order from EDA.ipynb
-        # Base features first
-        features = {
-            'N': N,
-            'P': P,
-            'K': K,
-            'temperature': temperature,
-            'humidity': humidity,
-            'ph': ph,
-            'rainfall': rainfall
-        }
+        # Columns follow _FEATURE_NAMES (exact order from EDA.ipynb), base features first
+        features = np.empty((len(samples), len(self._FEATURE_NAMES)), dtype=np.float32)
+        for row, sample in zip(features, samples):
+            row[0] = safe_float(sample.get('nitrogen', 0))
+            row[1] = safe_float(sample.get('phosphorus', 0))
+            row[2] = safe_float(sample.get('potassium', 0))
+            row[3] = safe_float(sample.get('temperature', 0))
+            row[4] = safe_float(sample.get('humidity', 0))
+            row[5] = safe_float(sample.get('ph', 0))
+            row[6] = safe_float(sample.get('rainfall', 0))
+        
+        if NUMBA_AVAILABLE:
+            _engineer_kernel(features)
+            return features
+        
+        N, P, K, temperature, humidity, ph, rainfall = features[:, :7].T
         
         # Engineered features (using exact logic from notebook)
-        features['NPK_sum'] = N + P + K
-        features['NP_ratio'] = N / (P + 1e-6)  # Avoid division by zero as in notebook
-        features['NK_ratio'] = N / (K + 1e-6)
-        features['PK_ratio'] = P / (K + 1e-6)
-        features['temp_humidity_interaction'] = temperature * humidity
-        features['rainfall_humidity_ratio'] = rainfall / (humidity + 1e-6)
-        
-        # pH categorization (exact logic from notebook)
-        if ph < 6.5:
-            features['ph_acidity_level'] = 1  # acidic
-        elif ph > 7.5:
-            features['ph_acidity_level'] = 3  # alkaline
-        else:
-            features['ph_acidity_level'] = 2  # neutral
-        
-        return pd.DataFrame([features])
-    
-    def preprocess_input(self, input_data: Dict[str, float]) -> np.ndarray:
-        """Preprocess input data for prediction"""
+        features[:, 7] = N + P + K
+        features[:, 8] = N / (P + 1e-6)  # Avoid division by zero as in notebook
+        features[:, 9] = N / (K + 1e-6)
+        features[:, 10] = P / (K + 1e-6)
+        features[:, 11] = temperature * humidity
+        features[:, 12] = rainfall / (humidity + 1e-6)
+        
+        # pH categorization (exact logic from notebook): 1 acidic, 2 neutral, 3 alkaline
+        features[:, 13] = 1 + (ph >= 6.5).astype(np.int8) + (ph > 7.5).astype(np.int8)
+        
+        return features
+    
+    def preprocess_input(self, input_data: Union[Dict[str, float], List[Dict[str, float]]]) -> np.ndarray:
+        """Preprocess one input dict or a list of them for prediction"""
         
         if not self.scaler:
             raise ValueError("Scaler not loaded")
         
-        # Engineer features
-        engineered_data = self.engineer_features(input_data)
+        return self._scale(self.engineer_features(input_data))
+    
+    def _scale(self, engineered_data: np.ndarray) -> np.ndarray:
+        """Scale engineered features (plain affine constants when the scaler type is known)"""
+        if self._scale_mul is not None:
+            return engineered_data * self._scale_mul + self._scale_add
+        return self.scaler.transform(engineered_data)
+    
+    def _predict_quantized(self, key: Tuple[int, ...]) -> np.ndarray:
+        """Class probabilities for one sample given as quantized base sensor values"""
+        sample = {param: value / _CACHE_QUANTUM for param, value in zip(_BASE_PARAMS, key)}
+        probabilities = self._predict_proba(self.engineer_features(sample))
+        probabilities.flags.writeable = False  # shared between cache hits
+        return probabilities
+    
+    def _predict_probabilities(self, inputs: List[Dict[str, float]]) -> np.ndarray:
+        """Class probabilities for every input; single samples go through the LRU cache"""
+        if len(inputs) == 1:
+            key = tuple(int(round(safe_float(inputs[0].get(param, 0)) * _CACHE_QUANTUM)) for param in _BASE_PARAMS)
+            return self._predict_cached(key)
+        return self._predict_proba(self.engineer_features(inputs))
+    
+    def _classify_confidence(self, confidence: float) -> str:
+        """Map a class probability to a suitability label"""
         
-        # Scale the data
-        scaled_data = self.scaler.transform(engineered_data)
+        if confidence >= ML_CONFIG['confidence_threshold']:
+            return "Sangat Cocok"
+        if confidence >= ML_CONFIG['low_confidence_threshold']:
+            return "Cukup Cocok"
+        return "Kurang Cocok"
+    
+    def evaluate_crop_suitability(self, input_data: Dict[str, float], selected_crop: str) -> CropEvaluation:
+        """Evaluate crop suitability and return prediction, confidence, and (lazy) explanation"""
         
-        return scaled_data
+        return self.evaluate_crop_suitability_batch([input_data], [selected_crop])[0]
     
-    def evaluate_crop_suitability(self, input_data: Dict[str, float], selected_crop: str) -> Tuple[str, float, str]:
-        """Evaluate crop suitability and return prediction, confidence, and explanation"""
+    def evaluate_crop_suitability_batch(self, inputs: List[Dict[str, float]],
+                                        selected_crops: List[str]) -> List[CropEvaluation]:
+        """Evaluate many (input, crop) pairs with a single scaler and predict_proba call"""
+        
+        if len(selected_crops) != len(inputs):
+            raise ValueError(f"Got {len(inputs)} inputs but {len(selected_crops)} selected crops")
         
         if not self.model or not self.label_encoder:
-            return "Error", 0.0, "Model tidak tersedia"
+            return [_error_evaluation("Model tidak tersedia") for _ in inputs]
         
         try:
-            # Preprocess input
-            scaled_data = self.preprocess_input(input_data)
+            # Preprocess and predict all samples at once
+            probabilities = self._predict_probabilities(inputs)
             
-            # Get prediction probabilities
-            probabilities = self.model.predict_proba(scaled_data)[0]
+            results = []
             
-            # Get crop index
-            crop_classes = self.label_encoder.classes_
-            
-            if selected_crop not in crop_classes:
-                return "Error", 0.0, f"Tanaman '{selected_crop}' tidak dikenali oleh model"
-            
-            crop_index = list(crop_classes).index(selected_crop)
-            confidence = probabilities[crop_index]
-            
-            # Determine recommendation
-            threshold_high = ML_CONFIG['confidence_threshold']
-            threshold_low = ML_CONFIG['low_confidence_threshold']
-            
-            if confidence >= threshold_high:
-                recommendation = "Sangat Cocok"
-            elif confidence >= threshold_low:
-                recommendation = "Cukup Cocok"
-            else:
-                recommendation = "Kurang Cocok"
-            
-            # Generate explanation
-            explanation = self.get_feature_explanation(input_data, selected_crop, confidence)
+            for input_data, selected_crop, row in zip(inputs, selected_crops, probabilities):
+                crop_index = self._crop_to_idx.get(selected_crop)
+                if crop_index is None:
+                    results.append(_error_evaluation(f"Tanaman '{selected_crop}' tidak dikenali oleh model"))
+                    continue
+                
+                confidence = row[crop_index]
+                recommendation = self._classify_confidence(confidence)
+                
+                # Explanation is generated only if the caller reads it
+                explain = partial(self.get_feature_explanation, input_data, selected_crop, confidence)
+                
+                results.append(CropEvaluation(recommendation, confidence, explain))
             
-            return recommendation, confidence, explanation
+            return results
             
         except Exception as e:
             error_msg = f"Error dalam evaluasi: {str(e)}"
             handle_error('evaluation_failed', error_msg)
-            return "Error", 0.0, error_msg
+            return [_error_evaluation(error_msg) for _ in inputs]
     
     def get_top_crop_recommendations(self, input_data: Dict[str, float], top_k: int = 5) -> List[Tuple[str, float]]:
         """Get top crop recommendations based on input conditions"""
         
+        return self.get_top_crop_recommendations_batch([input_data], top_k)[0]
+    
+    def get_top_crop_recommendations_batch(self, inputs: List[Dict[str, float]],
+                                           top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """Get top crop recommendations for many inputs with a single predict_proba call"""
+        
         if not self.model or not self.label_encoder:
-            return []
+            return [[] for _ in inputs]
         
         try:
-            # Preprocess input
-            scaled_data = self.preprocess_input(input_data)
-            
-            # Get prediction probabilities
-            probabilities = self.model.predict_proba(scaled_data)[0]
+            # Preprocess and predict all samples at once
+            probabilities = self._predict_probabilities(inputs)
             
             # Get crop classes
             crop_classes = self.label_encoder.classes_
+            n_classes = len(crop_classes)
+            k = min(top_k, n_classes)
+            if k <= 0:
+                return [[] for _ in inputs]
+            
+            # Select the top K per row in O(C), then order only those K by probability
+            if k < n_classes:
+                top = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(n_classes), probabilities.shape)
+            order = np.argsort(-np.take_along_axis(probabilities, top, axis=1), axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
             
-            # Create recommendations
-            recommendations = [(crop, prob) for crop, prob in zip(crop_classes, probabilities)]
-            
-            # Sort by probability and return top K
-            recommendations.sort(key=lambda x: x[1], reverse=True)
-            
-            return recommendations[:top_k]
+            return [
+                [(crop_classes[i], float(row[i])) for i in indices]
+                for row, indices in zip(probabilities, top)
+            ]
             
         except Exception as e:
             handle_error('recommendation_failed', f"Error getting recommendations: {str(e)}")
-            return []
+            return [[] for _ in inputs]
     
     def is_model_loaded(self) -> bool:
         """Check if models are loaded successfully"""
@@ -458,10 +705,52 @@ class AICropPredictor:
         
         info = {
             'model_loaded': self.is_model_loaded(),
-            'shap_available': SHAP_AVAILABLE and self.explainer is not None,
+            # Checked without touching the lazy explainer property, so no build or idle-timer reset
+            'shap_available': SHAP_AVAILABLE and self.model is not None and not self._explainer_failed,
+            'explainer_loaded': self._explainer is not None,
             'model_type': type(self.model).__name__ if self.model else None,
             'feature_count': len(self.scaler.feature_names_in_) if self.scaler and hasattr(self.scaler, 'feature_names_in_') else None,
             'crop_classes': list(self.label_encoder.classes_) if self.label_encoder else None
         }
         
-        return info 
\ No newline at end of file
+        return info 
+
+# ==================== PREDICTOR INSTANCE ====================
+
+@st.cache_resource(show_spinner=False)
+def get_predictor() -> AICropPredictor:
+    """Get the shared AI Crop Predictor (models are loaded once per process)"""
+    return AICropPredictor()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _evaluate_sensor_values(sensor_values: Tuple[float, ...], selected_crop: str) -> Tuple[str, float]:
+    """Evaluate one set of base sensor values (cached)
+    
+    Failures raise instead of returning, so st.cache_data never stores them and the next
+    submission retries. Explanations are left to _explain_sensor_values so SHAP runs only
+    for callers that read them.
+    """
+    result = get_predictor().evaluate_crop_suitability(dict(zip(_BASE_PARAMS, sensor_values)), selected_crop)
+    if result.recommendation == "Error":
+        raise RuntimeError(result.explanation)
+    return result.recommendation, float(result.confidence)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _explain_sensor_values(sensor_items: Tuple[Tuple[str, Any], ...], selected_crop: str, confidence: float) -> str:
+    """Explanation for the submitted sensor parameters (cached)
+    
+    Keyed on every sensor parameter in the submission, not just the model inputs, because the
+    simple explanation also lists extras such as land_area.
+    """
+    return get_predictor().get_feature_explanation(dict(sensor_items), selected_crop, confidence)
+
+def evaluate_crop_suitability_cached(sensor_data: Dict[str, Any], selected_crop: str) -> CropEvaluation:
+    """Evaluate crop suitability, reusing the result of an earlier identical submission"""
+    sensor_values = tuple(safe_float(sensor_data.get(param, 0)) for param in _BASE_PARAMS)
+    try:
+        recommendation, confidence = _evaluate_sensor_values(sensor_values, selected_crop)
+    except Exception as e:
+        return _error_evaluation(str(e))
+    sensor_items = tuple((param, value) for param, value in sensor_data.items() if param in SENSOR_PARAMS)
+    explain = partial(_explain_sensor_values, sensor_items, selected_crop, confidence)
+    return CropEvaluation(recommendation, confidence, explain)
@@ -12,10 +12,16 @@ Note: This is a partial refactoring. See REFACTORING_GUIDE.md for continuation s
 import streamlit as st
 import sys
 import os
+import re
+import json
+import uuid
 import numpy as np
+import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+logger = logging.getLogger(__name__)
+
 # Add the project root to the Python path so we can import our modules
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
@@ -28,7 +34,8 @@ from src.utils.helpers import (
 )
 from src.services.database import (
     get_mongodb_manager, init_database_session, 
-    save_interaction_to_db, load_interactions_from_db
+    save_interaction_in_background, load_interactions_from_db,
+    delete_interaction_in_background, report_background_save_failures
 )
 from src.services.location import (
     get_user_gps_location, get_current_location_data, 
@@ -39,7 +46,12 @@ from src.services.mapping import (
     update_map_pin_location, clear_map_pin,
     check_map_dependencies
 )
-from src.core.ml_predictor import AICropPredictor
+from src.core.ml_predictor import get_predictor, evaluate_crop_suitability_cached
+from src.components.history_panel import (
+    add_interaction_to_history, display_interaction_history,
+    get_current_interaction_data, restore_location_from_interaction,
+    remove_interaction_from_history
+)
 
 # Import LLM services
 from src.services.llm_service import agricultural_llm
@@ -49,6 +61,90 @@ from src.services.recommendation_engine import recommendation_engine
 from src.services.evaluation_service import evaluation_service
 from src.services.weather_service import weather_service
 
+# ==================== STATIC CONTENT ====================
+
+# Static markdown blocks rendered with a single st.markdown call per rerun
+_APP_HEADER_MD = (
+    f"# {UI_CONFIG['page_icon']} {UI_CONFIG['page_title']}\n\n"
+    "*Dapatkan rekomendasi tanaman instan dan saran optimisasi lingkungan berdasarkan kondisi lahan Anda*"
+)
+
+_SIDEBAR_HEADER_MD = f"# 📊 {UI_CONFIG['page_title']} Center"
+
+_WEATHER_SOURCE_MD = (
+    "**📡 Sumber Data:** [OpenMeteo API](https://open-meteo.com)\n\n"
+    "**⏰ Zona Waktu:** Asia/Jakarta (WIB)"
+)
+
+# Soil depth labels for the weather tab, keyed as returned by the weather service
+_SOIL_TEMP_DEPTH_LABELS = {
+    'surface': '0 cm (Permukaan)',
+    'shallow': '6 cm (Dangkal)',
+    'medium': '18 cm (Sedang)',
+    'deep': '54 cm (Dalam)'
+}
+
+_SOIL_MOISTURE_DEPTH_LABELS = {
+    'very_shallow': '0-1 cm (Sangat Dangkal)',
+    'shallow': '1-3 cm (Dangkal)',
+    'medium': '3-9 cm (Sedang)',
+    'deep': '9-27 cm (Dalam)',
+    'very_deep': '27-81 cm (Sangat Dalam)'
+}
+
+# Indexed by datetime.weekday() (Monday = 0)
+_DAY_NAMES_INDO = ("Sen", "Sel", "Rab", "Kam", "Jum", "Sab", "Min")
+
+# Units shown next to sensor values in LLM parameter prompts (others have none)
+_LLM_PARAM_UNITS = {
+    'nitrogen': 'kg/ha',
+    'phosphorus': 'kg/ha',
+    'potassium': 'kg/ha',
+    'temperature': '°C',
+    'humidity': '%',
+    'rainfall': 'mm'
+}
+
+# Indonesia-specific context appended to crop parameter recommendations
+_REGIONAL_PARAM_ADVICE = {
+    'humidity': "Sesuaikan dengan musim hujan/kemarau Indonesia.",
+    'rainfall': "Sesuaikan dengan musim hujan/kemarau Indonesia.",
+    'temperature': "Pertimbangkan iklim tropis Indonesia.",
+    'nitrogen': "Gunakan pupuk lokal yang tersedia di Indonesia.",
+    'phosphorus': "Gunakan pupuk lokal yang tersedia di Indonesia.",
+    'potassium': "Gunakan pupuk lokal yang tersedia di Indonesia."
+}
+
+# Sensor data keys that are not parameters and stay out of the LLM parameter context
+_LLM_CONTEXT_SKIP_KEYS = frozenset({
+    'selected_crop', 'selected_crop_display', 'location', 'coordinates',
+    'location_source', 'land_area', 'gps_accuracy', 'gps_timestamp'
+})
+
+# Session fields cleared when leaving GPS-completed mode to pick a location again
+_GPS_SELECTION_RESET = {
+    'gps_auto_refresh_completed': False,
+    'gps_location_data': None,
+    'selected_location_pin': None,
+    'selected_location': None,
+    'selected_location_source': None
+}
+
+# Sensor form keys (short aliases and full names) and the SENSOR_PARAMS entry that bounds each
+_SENSOR_FORM_KEYS = (
+    ('N', 'nitrogen'), ('P', 'phosphorus'), ('K', 'potassium'),
+    ('nitrogen', 'nitrogen'), ('phosphorus', 'phosphorus'), ('potassium', 'potassium'),
+    ('temperature', 'temperature'), ('humidity', 'humidity'), ('ph', 'ph'),
+    ('rainfall', 'rainfall'), ('land_area', 'land_area')
+)
+_SENSOR_FORM_MINS = np.array([SENSOR_PARAMS[param].min for _, param in _SENSOR_FORM_KEYS])
+_SENSOR_FORM_MAXS = np.array([SENSOR_PARAMS[param].max for _, param in _SENSOR_FORM_KEYS])
+_SENSOR_FORM_DEFAULTS = np.array([SENSOR_PARAMS[param].default for _, param in _SENSOR_FORM_KEYS])
+
+# Crop selectbox options and the option index for each model crop name (first match wins)
+_CROP_DISPLAY_OPTIONS = tuple(CROP_MAPPING)
+_CROP_OPTION_INDEX = {model_name: index for index, model_name in reversed(list(enumerate(CROP_MAPPING.values())))}
+
 # ==================== APP CONFIGURATION ====================
 
 def configure_streamlit():
@@ -68,8 +164,11 @@ def initialize_app():
     
     # Initialize database session
     init_database_session()
+    report_background_save_failures()
     
     # Load interaction history from MongoDB if not already loaded
+    # (the loader is cached per session; the guard keeps the live session list, and the
+    # history panel caches keyed on it, from being replaced on every rerun)
     if not st.session_state.interaction_history:
         mongo_manager = get_mongodb_manager()
         if mongo_manager.is_connected():
@@ -80,11 +179,10 @@ def initialize_app():
                 
                 # If there's a current_interaction_id set, restore its location data
                 if st.session_state.get('current_interaction_id'):
-                    from src.components.history_panel import get_current_interaction_data, restore_location_from_interaction
                     current_interaction = get_current_interaction_data()
                     if current_interaction:
                         restore_location_from_interaction(current_interaction)
-                        print(f"🔄 Location restored for current interaction on app startup")
+                        logger.debug("Location restored for current interaction on app startup")
         else:
             print("ℹ️ MongoDB not connected - starting with empty history")
     
@@ -118,21 +216,22 @@ def display_location_selection():
     
     st.markdown("## 📍 Pilih Lokasi Lahan Pertanian")
     
-    # Check for existing location states
-    if st.session_state.get('selected_location_pin'):
-        display_pin_mode()
+    # Check for existing location states (read once; the mode views reuse them)
+    session = st.session_state
+    pin = session.get('selected_location_pin')
+    if pin:
+        display_pin_mode(pin)
         return
     
-    if st.session_state.get('gps_auto_refresh_completed'):
-        display_gps_completed_mode()
+    if session.get('gps_auto_refresh_completed'):
+        display_gps_completed_mode(session.get('gps_location_data'))
         return
     
     # Show location selection tabs
     display_location_tabs()
 
-def display_pin_mode():
+def display_pin_mode(pin: Dict[str, Any]):
     """Display when a map pin is selected"""
-    pin = st.session_state.selected_location_pin
     
     st.success("✅ **Lokasi Interactive Map Terpilih**")
     
@@ -149,7 +248,12 @@ def display_pin_mode():
             st.rerun()
     
     
-    map_data = display_interactive_map(existing_pins=pin)
+    _map_fragment(existing_pin=pin)
+
+@st.fragment
+def _map_fragment(existing_pin: Optional[Dict[str, Any]] = None):
+    """Interactive map; pan/zoom reruns only this fragment, a new pin reruns the app"""
+    map_data = display_interactive_map(existing_pins=existing_pin)
     
     if map_data:
         new_location = handle_map_click(map_data)
@@ -159,11 +263,11 @@ def display_pin_mode():
                 new_location['lng'], 
                 new_location['address']
             )
+            # Pin summary and sensor form outside the fragment depend on the new location
             st.rerun()
 
-def display_gps_completed_mode():
+def display_gps_completed_mode(gps_data: Optional[Dict[str, Any]]):
     """Display when GPS auto-refresh is completed"""
-    gps_data = st.session_state.gps_location_data
     
     # ✅ FIXED: Check if gps_data is None to prevent TypeError
     if gps_data is None:
@@ -171,11 +275,7 @@ def display_gps_completed_mode():
         print("⚠️ GPS completed mode called but gps_location_data is None")
         
         # Clear GPS completion flag and return to location selection
-        st.session_state.gps_auto_refresh_completed = False
-        st.session_state.gps_location_data = None
-        st.session_state.selected_location_pin = None
-        st.session_state.selected_location = None
-        st.session_state.selected_location_source = None
+        st.session_state.update(_GPS_SELECTION_RESET)
         st.rerun()
         return
     
@@ -191,11 +291,7 @@ def display_gps_completed_mode():
     
     with col2:
         if st.button("✏️ Edit GPS", type="secondary"):
-            st.session_state.gps_auto_refresh_completed = False
-            st.session_state.gps_location_data = None
-            st.session_state.selected_location_pin = None
-            st.session_state.selected_location = None
-            st.session_state.selected_location_source = None
+            st.session_state.update(_GPS_SELECTION_RESET)
             st.rerun()
 
 def display_location_tabs():
@@ -209,18 +305,9 @@ def display_location_tabs():
     
     with tab2:
         st.markdown("### 🗺️ Interactive Map")
-        if check_map_dependencies()['folium'] and check_map_dependencies()['streamlit_folium']:
-            map_data = display_interactive_map()
-            
-            if map_data:
-                new_location = handle_map_click(map_data)
-                if new_location:
-                    update_map_pin_location(
-                        new_location['lat'], 
-                        new_location['lng'], 
-                        new_location['address']
-                    )
-                    st.rerun()
+        map_dependencies = check_map_dependencies()
+        if map_dependencies['folium'] and map_dependencies['streamlit_folium']:
+            _map_fragment()
         else:
             st.error("⚠️ **Interactive Map tidak tersedia** - Map libraries tidak terinstall")
             st.info("💡 **Solusi:** Install dengan `pip install folium streamlit-folium`")
@@ -229,63 +316,36 @@ def display_location_tabs():
 
 # ==================== SENSOR INPUT FORM ====================
 
-def clamp_sensor_value(param_name: str, value: float) -> float:
-    """Clamp sensor value to be within valid range to prevent Streamlit errors"""
-    
-    if param_name not in SENSOR_PARAMS:
-        return value
-    
-    param_config = SENSOR_PARAMS[param_name]
-    min_val = param_config['min']
-    max_val = param_config['max']
-    
-    # Clamp value to be within valid range
-    clamped_value = max(min_val, min(max_val, value))
-    
-    # Log if clamping occurred
-    if clamped_value != value:
-        print(f"⚠️ CLAMPED {param_name}: {value} → {clamped_value} (range: {min_val}-{max_val})")
-    
-    return clamped_value
+def _to_float_or_nan(value) -> float:
+    """Convert a form value to float, NaN when it is not numeric"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
 
 def validate_and_fix_default_data(default_data: dict) -> dict:
     """Validate and fix default data to ensure all values are within valid ranges"""
     
     fixed_data = default_data.copy()
     
-    # Map of possible parameter names to standard names
-    param_mapping = {
-        'N': 'nitrogen',
-        'P': 'phosphorus', 
-        'K': 'potassium',
-        'temperature': 'temperature',
-        'humidity': 'humidity',
-        'ph': 'ph',
-        'rainfall': 'rainfall',
-        'land_area': 'land_area'
-    }
+    present = [i for i, (key, _) in enumerate(_SENSOR_FORM_KEYS) if key in fixed_data]
+    if not present:
+        return fixed_data
     
-    for key, standard_name in param_mapping.items():
-        if key in fixed_data:
-            try:
-                original_value = float(fixed_data[key])
-                clamped_value = clamp_sensor_value(standard_name, original_value)
-                fixed_data[key] = clamped_value
-            except (ValueError, TypeError):
-                # If conversion fails, use default from config
-                fixed_data[key] = SENSOR_PARAMS[standard_name]['default']
-                print(f"⚠️ INVALID {key}: Using default {SENSOR_PARAMS[standard_name]['default']}")
-    
-    # Also check standard parameter names
-    for param_name in ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall', 'land_area']:
-        if param_name in fixed_data:
-            try:
-                original_value = float(fixed_data[param_name])
-                clamped_value = clamp_sensor_value(param_name, original_value)
-                fixed_data[param_name] = clamped_value
-            except (ValueError, TypeError):
-                fixed_data[param_name] = SENSOR_PARAMS[param_name]['default']
-                print(f"⚠️ INVALID {param_name}: Using default {SENSOR_PARAMS[param_name]['default']}")
+    values = np.array([_to_float_or_nan(fixed_data[_SENSOR_FORM_KEYS[i][0]]) for i in present])
+    
+    # Invalid values fall back to the config default, then everything is clamped in one pass
+    invalid = np.isnan(values)
+    values = np.where(invalid, _SENSOR_FORM_DEFAULTS[present], values)
+    clamped = np.clip(values, _SENSOR_FORM_MINS[present], _SENSOR_FORM_MAXS[present])
+    
+    for i, is_invalid, value, clamped_value in zip(present, invalid, values, clamped):
+        key = _SENSOR_FORM_KEYS[i][0]
+        if is_invalid:
+            print(f"⚠️ INVALID {key}: Using default {clamped_value}")
+        elif clamped_value != value:
+            print(f"⚠️ CLAMPED {key}: {value} → {clamped_value} (range: {_SENSOR_FORM_MINS[i]}-{_SENSOR_FORM_MAXS[i]})")
+        fixed_data[key] = float(clamped_value)
     
     return fixed_data
 
@@ -301,9 +361,12 @@ def display_sensor_form():
     default_data = {}
     current_interaction_data = None
     
+    # Snapshot the session fields that pick the form defaults
+    session = st.session_state
+    preset_data = session.preset_data
+    
     # Priority 1: Load from current interaction (history)
-    if st.session_state.current_interaction_id:
-        from src.components.history_panel import get_current_interaction_data
+    if session.current_interaction_id:
         current_interaction_data = get_current_interaction_data()
         if current_interaction_data and current_interaction_data.get('sensor_data'):
             default_data = current_interaction_data['sensor_data'].copy()
@@ -313,9 +376,9 @@ def display_sensor_form():
             st.info(f"🔄 **Loaded from history:** {crop_name} - {location_name} - {timestamp}")
     
     # Priority 2: Load from preset data
-    elif st.session_state.preset_data:
-        default_data = st.session_state.preset_data.copy()
-        preset_name = st.session_state.preset_name or "Custom"
+    elif preset_data:
+        default_data = preset_data.copy()
+        preset_name = session.preset_name or "Custom"
         
         # Show enhanced preset info with suggested location
         suggested_location = default_data.get('suggested_location')
@@ -336,7 +399,6 @@ def display_sensor_form():
                             'source': 'preset_suggestion'
                         }
                         st.session_state.temp_coordinates = coordinates
-                        st.success(f"✅ Location set: {suggested_location}")
                         st.rerun()
         else:
             st.info(f"📋 **Loaded preset:** {preset_name}")
@@ -346,7 +408,7 @@ def display_sensor_form():
     else:
         # Use default values from config
         for param in ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall', 'land_area']:
-            default_data[param] = SENSOR_PARAMS[param]['default']
+            default_data[param] = SENSOR_PARAMS[param].default
     
     # CRITICAL: Validate and fix default data to prevent Streamlit errors
     default_data = validate_and_fix_default_data(default_data)
@@ -358,9 +420,8 @@ def display_sensor_form():
     with st.form("sensor_form"):
         # Location status display
         if location_available:
-            lat = np.round(location_data['coordinates']['lat'], 6)
-            lng = np.round(location_data['coordinates']['lng'], 6)
-            st.success(f"📍 **Lokasi Terpilih:** {location_data['address']} ({lat}, {lng})")
+            coordinates = location_data['coordinates']
+            st.success(f"📍 **Lokasi Terpilih:** {location_data['address']} ({coordinates['lat']:.6f}, {coordinates['lng']:.6f})")
         else:
             st.warning("⚠️ **Pilih lokasi terlebih dahulu di bagian atas untuk mengaktifkan input sensor**")
         
@@ -370,39 +431,39 @@ def display_sensor_form():
             st.markdown("### Nutrisi Tanah")
             nitrogen = st.number_input(
                 "Nitrogen (N)", 
-                min_value=SENSOR_PARAMS['nitrogen']['min'],
-                max_value=SENSOR_PARAMS['nitrogen']['max'],
-                value=float(default_data.get('N', default_data.get('nitrogen', SENSOR_PARAMS['nitrogen']['default']))),
+                min_value=SENSOR_PARAMS['nitrogen'].min,
+                max_value=SENSOR_PARAMS['nitrogen'].max,
+                value=float(default_data.get('N', default_data.get('nitrogen', SENSOR_PARAMS['nitrogen'].default))),
                 step=1.0,
-                help=f"Kadar nitrogen dalam tanah ({SENSOR_PARAMS['nitrogen']['unit']})" if location_available else "Pilih lokasi terlebih dahulu",
+                help=f"Kadar nitrogen dalam tanah ({SENSOR_PARAMS['nitrogen'].unit})" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
             )
             
             phosphorus = st.number_input(
                 "Phosphorus (P)",
-                min_value=SENSOR_PARAMS['phosphorus']['min'],
-                max_value=SENSOR_PARAMS['phosphorus']['max'], 
-                value=float(default_data.get('P', default_data.get('phosphorus', SENSOR_PARAMS['phosphorus']['default']))),
+                min_value=SENSOR_PARAMS['phosphorus'].min,
+                max_value=SENSOR_PARAMS['phosphorus'].max, 
+                value=float(default_data.get('P', default_data.get('phosphorus', SENSOR_PARAMS['phosphorus'].default))),
                 step=1.0,
-                help=f"Kadar fosfor dalam tanah ({SENSOR_PARAMS['phosphorus']['unit']})" if location_available else "Pilih lokasi terlebih dahulu",
+                help=f"Kadar fosfor dalam tanah ({SENSOR_PARAMS['phosphorus'].unit})" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
             )
             
             potassium = st.number_input(
                 "Potassium (K)",
-                min_value=SENSOR_PARAMS['potassium']['min'],
-                max_value=SENSOR_PARAMS['potassium']['max'],
-                value=float(default_data.get('K', default_data.get('potassium', SENSOR_PARAMS['potassium']['default']))),
+                min_value=SENSOR_PARAMS['potassium'].min,
+                max_value=SENSOR_PARAMS['potassium'].max,
+                value=float(default_data.get('K', default_data.get('potassium', SENSOR_PARAMS['potassium'].default))),
                 step=1.0,
-                help=f"Kadar kalium dalam tanah ({SENSOR_PARAMS['potassium']['unit']})" if location_available else "Pilih lokasi terlebih dahulu",
+                help=f"Kadar kalium dalam tanah ({SENSOR_PARAMS['potassium'].unit})" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
             )
             
             ph = st.number_input(
                 "pH Tanah",
-                min_value=SENSOR_PARAMS['ph']['min'],
-                max_value=SENSOR_PARAMS['ph']['max'],
-                value=float(default_data.get('ph', SENSOR_PARAMS['ph']['default'])),
+                min_value=SENSOR_PARAMS['ph'].min,
+                max_value=SENSOR_PARAMS['ph'].max,
+                value=float(default_data.get('ph', SENSOR_PARAMS['ph'].default)),
                 step=0.1,
                 help="Tingkat keasaman tanah (pH)" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
@@ -411,11 +472,11 @@ def display_sensor_form():
             st.markdown("### Luas Lahan")
             land_area = st.number_input(
                 "Luas Lahan Pertanian",
-                min_value=SENSOR_PARAMS['land_area']['min'],
-                max_value=SENSOR_PARAMS['land_area']['max'],
-                value=float(default_data.get('land_area', SENSOR_PARAMS['land_area']['default'])),
+                min_value=SENSOR_PARAMS['land_area'].min,
+                max_value=SENSOR_PARAMS['land_area'].max,
+                value=float(default_data.get('land_area', SENSOR_PARAMS['land_area'].default)),
                 step=0.1,
-                help=f"Luas lahan yang akan ditanami ({SENSOR_PARAMS['land_area']['unit']})" if location_available else "Pilih lokasi terlebih dahulu",
+                help=f"Luas lahan yang akan ditanami ({SENSOR_PARAMS['land_area'].unit})" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
             )
         
@@ -423,52 +484,43 @@ def display_sensor_form():
             st.markdown("### Kondisi Lingkungan")
             temperature = st.number_input(
                 "Temperature",
-                min_value=SENSOR_PARAMS['temperature']['min'],
-                max_value=SENSOR_PARAMS['temperature']['max'],
-                value=float(default_data.get('temperature', SENSOR_PARAMS['temperature']['default'])),
+                min_value=SENSOR_PARAMS['temperature'].min,
+                max_value=SENSOR_PARAMS['temperature'].max,
+                value=float(default_data.get('temperature', SENSOR_PARAMS['temperature'].default)),
                 step=0.1,
-                help=f"Suhu lingkungan ({SENSOR_PARAMS['temperature']['unit']})" if location_available else "Pilih lokasi terlebih dahulu",
+                help=f"Suhu lingkungan ({SENSOR_PARAMS['temperature'].unit})" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
             )
             
             humidity = st.number_input(
                 "Humidity", 
-                min_value=SENSOR_PARAMS['humidity']['min'],
-                max_value=SENSOR_PARAMS['humidity']['max'],
-                value=float(default_data.get('humidity', SENSOR_PARAMS['humidity']['default'])),
+                min_value=SENSOR_PARAMS['humidity'].min,
+                max_value=SENSOR_PARAMS['humidity'].max,
+                value=float(default_data.get('humidity', SENSOR_PARAMS['humidity'].default)),
                 step=1.0,
-                help=f"Kelembaban udara ({SENSOR_PARAMS['humidity']['unit']})" if location_available else "Pilih lokasi terlebih dahulu",
+                help=f"Kelembaban udara ({SENSOR_PARAMS['humidity'].unit})" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
             )
             
             rainfall = st.number_input(
                 "Rainfall",
-                min_value=SENSOR_PARAMS['rainfall']['min'],
-                max_value=SENSOR_PARAMS['rainfall']['max'],
-                value=float(default_data.get('rainfall', SENSOR_PARAMS['rainfall']['default'])),
+                min_value=SENSOR_PARAMS['rainfall'].min,
+                max_value=SENSOR_PARAMS['rainfall'].max,
+                value=float(default_data.get('rainfall', SENSOR_PARAMS['rainfall'].default)),
                 step=10.0,
-                help=f"Curah hujan ({SENSOR_PARAMS['rainfall']['unit']})" if location_available else "Pilih lokasi terlebih dahulu",
+                help=f"Curah hujan ({SENSOR_PARAMS['rainfall'].unit})" if location_available else "Pilih lokasi terlebih dahulu",
                 disabled=not location_available
             )
             
         st.markdown("### Target Tanaman")
         
-        # Get default crop selection
+        # Get default crop selection (falls back to the first option)
         default_crop = default_data.get('selected_crop', 'rice')
-        # Find display name for default crop
-        default_crop_display = None
-        for display_name, model_name in CROP_MAPPING.items():
-            if model_name == default_crop:
-                default_crop_display = display_name
-                break
-        
-        if not default_crop_display:
-            default_crop_display = list(CROP_MAPPING.keys())[0]  # Fallback to first option
         
         selected_crop_display = st.selectbox(
             "Pilih Tanaman",
-            options=list(CROP_MAPPING.keys()),
-            index=list(CROP_MAPPING.keys()).index(default_crop_display),
+            options=_CROP_DISPLAY_OPTIONS,
+            index=_CROP_OPTION_INDEX.get(default_crop, 0),
             help="Pilih jenis tanaman yang ingin ditanam" if location_available else "Pilih lokasi terlebih dahulu",
             disabled=not location_available
         )
@@ -497,6 +549,11 @@ def display_sensor_form():
                 'location_source': location_data.get('source', 'unknown')
             }
             
+            # Keep the GPS fix details so a restored interaction reuses them as-is
+            if sensor_data['location_source'] == 'gps':
+                sensor_data['gps_accuracy'] = location_data.get('accuracy')
+                sensor_data['gps_timestamp'] = location_data.get('timestamp')
+            
             return sensor_data
     
     # Form was displayed but not submitted or no location available
@@ -508,7 +565,6 @@ def display_loaded_interaction_results():
     """Display beautiful read-only view of loaded interaction from history with consistent tabs"""
     
     # Get current loaded interaction
-    from src.components.history_panel import get_current_interaction_data
     interaction_data = get_current_interaction_data()
     
     if not interaction_data:
@@ -671,11 +727,10 @@ def display_loaded_interaction_results():
             } if ml_result else {}
         }
         
-        # ✅ DEBUG: Log what AI data is being displayed
-        print(f"🖥️ Displaying AI analysis for interaction: {interaction_data.get('id')}")
-        print(f"  🎯 Analysis Type: {evaluation_for_display['analysis_type']}")
-        print(f"  📝 LLM Analysis: {len(evaluation_for_display['llm_analysis'])} chars")
-        print(f"  💡 Recommendations: {list(evaluation_for_display['recommendations'].keys())}")
+        # ✅ DEBUG: Log what AI data is being displayed (runs on every rerun of a loaded interaction)
+        logger.debug("Displaying AI analysis for interaction %s: type=%s, llm_analysis=%d chars, recommendations=%s",
+                     interaction_data.get('id'), evaluation_for_display['analysis_type'],
+                     len(evaluation_for_display['llm_analysis']), list(evaluation_for_display['recommendations']))
         
         # Show clean AI analysis info
         if evaluation_for_display['analysis_type'] != 'unknown':
@@ -721,28 +776,21 @@ def display_loaded_interaction_results():
     
     with action_cols[1]:
         if st.button("🗑️ Hapus Interaction", type="secondary"):
-            # Import database service
-            from src.services.database import get_mongodb_manager
-            
             # Remove from session state
             interaction_id = interaction_data.get('id')
-            st.session_state.interaction_history = [
-                i for i in st.session_state.interaction_history 
-                if i.get('id') != interaction_id
-            ]
+            remove_interaction_from_history(interaction_id)
             
             # Remove from MongoDB
             mongo_manager = get_mongodb_manager()
             if mongo_manager.is_connected():
-                mongo_manager.delete_interaction(interaction_id)
-                print(f"✅ Deleted interaction {interaction_id} from MongoDB")
+                delete_interaction_in_background(interaction_id)
+                print(f"✅ Queued delete of interaction {interaction_id} from MongoDB")
             else:
                 print(f"⚠️ Deleted interaction {interaction_id} from session only")
             
             # Clear current interaction and return to new analysis
             st.session_state.current_interaction_id = None
             st.session_state.sidebar_mode = 'history'
-            st.success("✅ **Interaction berhasil dihapus**")
             st.rerun()
 
 # ==================== RESULTS DISPLAY ====================
@@ -1060,10 +1108,9 @@ def display_weather_tab(location_data: Dict[str, Any] = None, sensor_data: Dict[
     updated_time = weather_data.get('updated_at', '')
     
     if updated_time:
-        from datetime import datetime
         try:
             update_dt = datetime.fromisoformat(updated_time.replace('Z', '+00:00'))
-            time_str = update_dt.strftime("%d/%m/%Y %H:%M WIB")
+            time_str = f"{update_dt.day:02d}/{update_dt.month:02d}/{update_dt.year} {update_dt.hour:02d}:{update_dt.minute:02d} WIB"
         except:
             time_str = updated_time
     else:
@@ -1128,16 +1175,9 @@ def display_weather_tab(location_data: Dict[str, Any] = None, sensor_data: Dict[
         soil_temps = soil.get('temperature', {})
         if soil_temps:
             with st.expander("📊 Detail Suhu Tanah per Kedalaman"):
-                depth_labels = {
-                    'surface': '0 cm (Permukaan)',
-                    'shallow': '6 cm (Dangkal)',
-                    'medium': '18 cm (Sedang)',
-                    'deep': '54 cm (Dalam)'
-                }
-                
                 for depth, temp in soil_temps.items():
-                    if depth in depth_labels:
-                        st.write(f"• **{depth_labels[depth]}:** {temp:.1f}°C")
+                    if depth in _SOIL_TEMP_DEPTH_LABELS:
+                        st.write(f"• **{_SOIL_TEMP_DEPTH_LABELS[depth]}:** {temp:.1f}°C")
     
     with soil_col2:
         st.metric(
@@ -1150,17 +1190,9 @@ def display_weather_tab(location_data: Dict[str, Any] = None, sensor_data: Dict[
         soil_moistures = soil.get('moisture', {})
         if soil_moistures:
             with st.expander("📊 Detail Kelembapan Tanah per Kedalaman"):
-                moisture_labels = {
-                    'very_shallow': '0-1 cm (Sangat Dangkal)',
-                    'shallow': '1-3 cm (Dangkal)',
-                    'medium': '3-9 cm (Sedang)',
-                    'deep': '9-27 cm (Dalam)',
-                    'very_deep': '27-81 cm (Sangat Dalam)'
-                }
-                
                 for depth, moisture in soil_moistures.items():
-                    if depth in moisture_labels:
-                        st.write(f"• **{moisture_labels[depth]}:** {moisture:.3f} m³/m³")
+                    if depth in _SOIL_MOISTURE_DEPTH_LABELS:
+                        st.write(f"• **{_SOIL_MOISTURE_DEPTH_LABELS[depth]}:** {moisture:.3f} m³/m³")
     
     # Daily Forecast
     daily_forecast = weather_data.get('daily_forecast', [])
@@ -1175,10 +1207,9 @@ def display_weather_tab(location_data: Dict[str, Any] = None, sensor_data: Dict[
                 with forecast_cols[i]:
                     date_str = day_data.get('date', '')
                     try:
-                        from datetime import datetime
                         date_obj = datetime.fromisoformat(date_str)
-                        day_label = date_obj.strftime("%d/%m")
-                        day_name = ["Sen", "Sel", "Rab", "Kam", "Jum", "Sab", "Min"][date_obj.weekday()]
+                        day_label = f"{date_obj.day:02d}/{date_obj.month:02d}"
+                        day_name = _DAY_NAMES_INDO[date_obj.weekday()]
                     except:
                         day_label = date_str
                         day_name = ""
@@ -1208,8 +1239,7 @@ def display_weather_tab(location_data: Dict[str, Any] = None, sensor_data: Dict[
         st.markdown(f"**🧭 Arah Angin:** {wind_direction:.0f}°")
     
     with additional_col2:
-        st.markdown("**📡 Sumber Data:** [OpenMeteo API](https://open-meteo.com)")
-        st.markdown(f"**⏰ Zona Waktu:** Asia/Jakarta (WIB)")
+        st.markdown(_WEATHER_SOURCE_MD)
     
     # Agricultural recommendations based on weather
     if sensor_data:
@@ -1260,22 +1290,23 @@ def analyze_parameter_with_llm(param_name: str, value: float, crop_type: str, al
             # Import if not available globally
             from src.services.llm_service import agricultural_llm
         
+        param_key = param_name.lower()
+        
         # Prepare context for LLM analysis
         context = f"""
         **Analisis Parameter: {param_name}**
         
         **Data Tanaman:**
         - Jenis Tanaman: {crop_type}
-        - {param_name}: {value} {'kg/ha' if param_name.lower() in ['nitrogen', 'phosphorus', 'potassium'] else '°C' if param_name.lower() == 'temperature' else '%' if param_name.lower() == 'humidity' else 'mm' if param_name.lower() == 'rainfall' else ''}
+        - {param_name}: {value} {_LLM_PARAM_UNITS.get(param_key, '')}
         
         **Konteks Parameter Lainnya:**
         """
         
         if all_sensor_data:
             for key, val in all_sensor_data.items():
-                if key != param_name.lower() and key not in ['selected_crop', 'selected_crop_display', 'location', 'coordinates', 'location_source', 'land_area']:
-                    unit = 'kg/ha' if key in ['nitrogen', 'phosphorus', 'potassium'] else '°C' if key == 'temperature' else '%' if key == 'humidity' else 'mm' if key == 'rainfall' else ''
-                    context += f"- {key.title()}: {val} {unit}\n"
+                if key != param_key and key not in _LLM_CONTEXT_SKIP_KEYS:
+                    context += f"- {key.title()}: {val} {_LLM_PARAM_UNITS.get(key, '')}\n"
         
         # Create prompt for LLM analysis
         prompt = f"""
@@ -1313,9 +1344,6 @@ def analyze_parameter_with_llm(param_name: str, value: float, crop_type: str, al
         if response and response.strip():
             try:
                 # Try to parse JSON response
-                import json
-                import re
-                
                 # Extract JSON from response
                 json_match = re.search(r'\{.*\}', response, re.DOTALL)
                 if json_match:
@@ -1328,13 +1356,13 @@ def analyze_parameter_with_llm(param_name: str, value: float, crop_type: str, al
                         return analysis
                     
             except (json.JSONDecodeError, Exception) as e:
-                print(f"⚠️ [DEBUG] LLM JSON parsing error for {param_name}: {e}")
+                logger.debug("LLM JSON parsing error for %s: %s", param_name, e)
         
         # Fallback if LLM fails
         return get_fallback_parameter_analysis(param_name, value, crop_type)
         
     except Exception as e:
-        print(f"⚠️ [DEBUG] LLM parameter analysis error for {param_name}: {e}")
+        logger.debug("LLM parameter analysis error for %s: %s", param_name, e)
         return get_fallback_parameter_analysis(param_name, value, crop_type)
 
 def get_fallback_parameter_analysis(param_name: str, value: float, crop_type: str) -> Dict[str, Any]:
@@ -1687,15 +1715,9 @@ def get_fallback_parameter_analysis(param_name: str, value: float, crop_type: st
             })
     
     # Add regional Indonesia-specific advice
-    if 'recommendation' in analysis:
-        base_rec = analysis['recommendation']
-        # Add Indonesia-specific context
-        if param_lower in ['humidity', 'rainfall']:
-            analysis['recommendation'] = f"{base_rec} Sesuaikan dengan musim hujan/kemarau Indonesia."
-        elif param_lower == 'temperature':
-            analysis['recommendation'] = f"{base_rec} Pertimbangkan iklim tropis Indonesia."
-        elif param_lower in ['nitrogen', 'phosphorus', 'potassium']:
-            analysis['recommendation'] = f"{base_rec} Gunakan pupuk lokal yang tersedia di Indonesia."
+    regional_advice = _REGIONAL_PARAM_ADVICE.get(param_lower)
+    if regional_advice and 'recommendation' in analysis:
+        analysis['recommendation'] = f"{analysis['recommendation']} {regional_advice}"
     
     return analysis
 
@@ -1720,6 +1742,7 @@ def display_ai_analysis_tab(evaluation: Dict[str, Any]):
         llm_available = False
     
     # Show LLM status
+    agricultural_llm.report_missing_api_key()
     if not llm_available:
         st.warning("⚠️ **Status:** Menggunakan analisis dasar (LLM tidak tersedia)")
     
@@ -2012,7 +2035,8 @@ def display_alternatives_tab(evaluation: Dict[str, Any]):
 def save_comprehensive_results(evaluation: Dict[str, Any], location_advice: Dict[str, Any], sensor_data: Dict[str, Any]):
     """Save comprehensive evaluation results with clean MongoDB document format"""
     
-    import uuid
+    # Single timestamp shared by the AI result and the interaction record
+    now = datetime.now()
     
     # Extract ML results from evaluation
     ml_analysis = evaluation.get('ml_analysis', {})
@@ -2044,7 +2068,7 @@ def save_comprehensive_results(evaluation: Dict[str, Any], location_advice: Dict
         'recommendations': essential_recommendations,
         'suitability_score': evaluation.get('suitability_score', 0.0),
         'confidence_level': evaluation.get('confidence_level', 'medium'),
-        'analysis_timestamp': datetime.now().isoformat(),
+        'analysis_timestamp': now.isoformat(),
         'analysis_type': 'comprehensive' if llm_analysis else 'basic'
     }
     
@@ -2060,7 +2084,7 @@ def save_comprehensive_results(evaluation: Dict[str, Any], location_advice: Dict
     # ✅ CLEAN: MongoDB document structure
     interaction_data = {
         'id': str(uuid.uuid4())[:8],
-        'timestamp': datetime.now(),
+        'timestamp': now,
         'sensor_data': sensor_data,
         'ml_result': ml_result,
         'ai_result': ai_result,  # ✅ Clean AI results
@@ -2086,25 +2110,16 @@ def save_comprehensive_results(evaluation: Dict[str, Any], location_advice: Dict
         print(f"✅ Preset '{preset_name}' successfully used and cleared")
     
     # Save to session state
-    if 'interaction_history' not in st.session_state:
-        st.session_state.interaction_history = []
-    
-    st.session_state.interaction_history.append(interaction_data)
-    st.session_state.current_interaction_id = interaction_data['id']
-    
-    # Keep only last 50 interactions in session state
-    if len(st.session_state.interaction_history) > 50:
-        st.session_state.interaction_history = st.session_state.interaction_history[-50:]
+    add_interaction_to_history(interaction_data)
     
-    # Save to MongoDB
-    if save_interaction_to_db(interaction_data):
-        st.success("✅ **Analisis AI telah disimpan ke database dan history**")
-        print(f"✅ AI analysis successfully saved to MongoDB: {interaction_data['id']}")
-        st.session_state.sidebar_mode = 'history'
+    # Save to MongoDB in the background; failures surface as a toast on a later rerun
+    st.success("✅ **Analisis AI telah disimpan ke session history**")
+    if get_mongodb_manager().is_connected():
+        save_interaction_in_background(interaction_data)
+        print(f"💾 AI analysis queued for MongoDB: {interaction_data['id']}")
     else:
-        st.success("✅ **Analisis AI telah disimpan ke session history**")
         print(f"⚠️ AI analysis saved to session only: {interaction_data['id']}")
-        st.session_state.sidebar_mode = 'history'
+    st.session_state.sidebar_mode = 'history'
     
     # Show action buttons
     col1 = st.columns(1)
@@ -2119,14 +2134,14 @@ def display_basic_analysis_fallback(sensor_data: Dict[str, Any]):
     """Fallback to basic ML analysis if comprehensive analysis fails"""
     
     try:
-        predictor = AICropPredictor()
+        predictor = get_predictor()
         
         if not predictor.is_model_loaded():
             st.error("❌ **Model ML tidak dapat dimuat** - Periksa file model di folder `data/`")
             return
         
         # Get prediction
-        recommendation, confidence, explanation = predictor.evaluate_crop_suitability(
+        recommendation, confidence, explanation = evaluate_crop_suitability_cached(
             sensor_data, sensor_data['selected_crop']
         )
         
@@ -2156,11 +2171,12 @@ def display_basic_analysis_fallback(sensor_data: Dict[str, Any]):
         st.markdown("### 💡 Penjelasan ML Model")
         st.markdown(explanation)
         
+        agricultural_llm.report_missing_api_key()
         st.info("ℹ️ **Menampilkan analisis dasar karena layanan LLM tidak tersedia**")
         
         # ✅ FIXED: Save basic analysis results to history and MongoDB
         try:
-            import uuid
+            now = datetime.now()
             
             # ✅ CLEAN: Basic AI result using same format as comprehensive
             basic_ai_result = {
@@ -2170,7 +2186,7 @@ def display_basic_analysis_fallback(sensor_data: Dict[str, Any]):
                 },
                 'suitability_score': confidence,
                 'confidence_level': "high" if confidence > 0.7 else "medium" if confidence > 0.5 else "low",
-                'analysis_timestamp': datetime.now().isoformat(),
+                'analysis_timestamp': now.isoformat(),
                 'analysis_type': 'basic'
             }
             
@@ -2185,7 +2201,7 @@ def display_basic_analysis_fallback(sensor_data: Dict[str, Any]):
             # ✅ CLEAN: Same document structure as comprehensive analysis
             interaction_data = {
                 'id': str(uuid.uuid4())[:8],
-                'timestamp': datetime.now(),
+                'timestamp': now,
                 'sensor_data': sensor_data,
                 'ml_result': ml_result,
                 'ai_result': basic_ai_result,  # ✅ Clean basic AI results
@@ -2203,22 +2219,14 @@ def display_basic_analysis_fallback(sensor_data: Dict[str, Any]):
             print(f"  💡 Recommendations: {len(basic_ai_result['recommendations'])} categories")
             
             # Save to session state
-            if 'interaction_history' not in st.session_state:
-                st.session_state.interaction_history = []
-            
-            st.session_state.interaction_history.append(interaction_data)
-            st.session_state.current_interaction_id = interaction_data['id']
-            
-            # Keep only last 50 interactions in session state
-            if len(st.session_state.interaction_history) > 50:
-                st.session_state.interaction_history = st.session_state.interaction_history[-50:]
+            add_interaction_to_history(interaction_data)
             
-            # Save to MongoDB
-            if save_interaction_to_db(interaction_data):
-                st.success("✅ **Analisis dasar AI telah disimpan ke database dan history**") 
-                print(f"✅ Basic AI analysis saved to MongoDB: {interaction_data['id']}")
+            # Save to MongoDB in the background; failures surface as a toast on a later rerun
+            st.success("✅ **Analisis dasar AI telah disimpan ke session history**")
+            if get_mongodb_manager().is_connected():
+                save_interaction_in_background(interaction_data)
+                print(f"💾 Basic AI analysis queued for MongoDB: {interaction_data['id']}")
             else:
-                st.success("✅ **Analisis dasar AI telah disimpan ke session history**")
                 print(f"⚠️ Basic AI analysis saved to session only: {interaction_data['id']}")
             
             # Update sidebar mode to show history
@@ -2293,7 +2301,7 @@ def reset_session_to_default():
 def display_sidebar():
     """Display sidebar with history and controls - Enhanced with better integration"""
     
-    st.sidebar.markdown(f"# 📊 {UI_CONFIG['page_title']} Center")
+    st.sidebar.markdown(_SIDEBAR_HEADER_MD)
     
     # Status indicators
     preset_loaded = bool(st.session_state.preset_data)
@@ -2308,9 +2316,7 @@ def display_sidebar():
     # Mode selection buttons with enhanced labels
     col1, col2 = st.sidebar.columns(2)
     with col1:
-        history_count = len(st.session_state.interaction_history)
-        history_label = f"📋 History" if history_count > 0 else "📋 History"
-        if st.button(history_label, type="primary" if st.session_state.sidebar_mode == 'history' else "secondary"):
+        if st.button("📋 History", type="primary" if st.session_state.sidebar_mode == 'history' else "secondary"):
             st.session_state.sidebar_mode = 'history'
     with col2:
         new_label = "➕ New" + (" ✨" if preset_loaded else "")
@@ -2323,7 +2329,6 @@ def display_sidebar():
     
     # Display appropriate sidebar content based on mode
     if st.session_state.sidebar_mode == 'history':
-        from src.components.history_panel import display_interaction_history
         display_interaction_history()
 
 # ==================== MAIN APPLICATION ====================
@@ -2338,8 +2343,7 @@ def main():
     initialize_app()
     
     # Display header (use new title from config)
-    st.markdown(f"# {UI_CONFIG['page_icon']} {UI_CONFIG['page_title']}")
-    st.markdown("*Dapatkan rekomendasi tanaman instan dan saran optimisasi lingkungan berdasarkan kondisi lahan Anda*")
+    st.markdown(_APP_HEADER_MD)
     
     # Display sidebar
     display_sidebar()
@@ -62,6 +62,7 @@ Contains MongoDB manager and database operations.
 import streamlit as st
 from datetime import datetime
 from typing import Dict, List, Optional, Any
+from concurrent.futures import Future, ThreadPoolExecutor
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 
@@ -117,6 +118,8 @@ class MongoDBManager:
                 self.collection.create_index("interaction_id", unique=True)
                 self.collection.create_index("timestamp")
                 self.collection.create_index("user_session")
+                # Serves the per-session history query (filter + newest-first sort) without an in-memory sort
+                self.collection.create_index([("user_session", 1), ("timestamp", -1)])
             except Exception as index_error:
                 print(f"⚠️ Index creation warning: {index_error}")
             
@@ -146,8 +149,12 @@ class MongoDBManager:
         self.connected = False
         return self._connect()
     
-    def save_interaction(self, interaction_data: Dict) -> bool:
-        """Save interaction to MongoDB with detailed debugging and clean document structure"""
+    def save_interaction(self, interaction_data: Dict, user_session: Optional[str] = None) -> bool:
+        """Save interaction to MongoDB with detailed debugging and clean document structure
+        
+        Pass user_session explicitly when calling outside the Streamlit script thread,
+        where session state is not available.
+        """
         if not self.connected:
             print("⚠️ MongoDB not connected - skipping database save")
             print("🔧 Interaction will be saved to session history only")
@@ -178,7 +185,10 @@ class MongoDBManager:
             print(f"  📊 Location Source: {location_source}")
             
             # Get user session with fallback
-            user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+            if user_session is None:
+                user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+            
+            now = datetime.now()
             
             # ✅ IMPROVED: Clean document structure for MongoDB
             document = {
@@ -193,8 +203,8 @@ class MongoDBManager:
                 "suitability_score": cleaned_data.get("suitability_score", 0.0),
                 "confidence_level": cleaned_data.get("confidence_level", "medium"),
                 "analysis_status": cleaned_data.get("analysis_status", "completed"),
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
+                "created_at": now,
+                "updated_at": now
             }
             
             # ✅ REMOVED: Don't save heavy/unnecessary fields like evaluation_result, location_advice, risk_level
@@ -225,14 +235,19 @@ class MongoDBManager:
             handle_error('database_save_failed', f"Could not save to database: {str(e)}", show_streamlit=False)
             return False
     
-    def load_interactions(self, limit: int = 50) -> List[Dict]:
-        """Load recent interactions from MongoDB with debugging and backward compatibility"""
+    def load_interactions(self, limit: int = 50, user_session: Optional[str] = None) -> List[Dict]:
+        """Load recent interactions from MongoDB with debugging and backward compatibility
+        
+        Returns the most recent `limit` interactions in chronological order
+        (oldest first), matching the append order of session history.
+        """
         if not self.connected:
             print("⚠️ MongoDB not connected - cannot load from database")
             return []
             
         try:
-            user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+            if user_session is None:
+                user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
             print(f"🔍 Querying MongoDB for user_session: '{user_session}'")
             
             # Query recent interactions for current user
@@ -287,10 +302,13 @@ class MongoDBManager:
                 }
                 interactions.append(interaction)
             
+            # Query returns newest first; session history is kept oldest first
+            interactions.reverse()
+            
             print(f"📊 Found {len(interactions)} interactions in MongoDB")
             if len(interactions) > 0:
-                latest = interactions[0]['timestamp']
-                latest_analysis_type = interactions[0].get('ai_result', {}).get('analysis_type', 'unknown')
+                latest = interactions[-1]['timestamp']
+                latest_analysis_type = interactions[-1].get('ai_result', {}).get('analysis_type', 'unknown')
                 print(f"📅 Latest interaction: {latest} (Type: {latest_analysis_type})")
             
             return interactions
@@ -335,13 +353,18 @@ class MongoDBManager:
             handle_error('database_get_failed', f"Could not get interaction: {str(e)}", show_streamlit=False)
             return None
     
-    def delete_interaction(self, interaction_id: str) -> bool:
-        """Delete specific interaction from MongoDB"""
+    def delete_interaction(self, interaction_id: str, user_session: Optional[str] = None) -> bool:
+        """Delete specific interaction from MongoDB
+        
+        Pass user_session explicitly when calling outside the Streamlit script thread,
+        where session state is not available.
+        """
         if not self.connected:
             return False
             
         try:
-            user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+            if user_session is None:
+                user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
             result = self.collection.delete_one({
                 "interaction_id": interaction_id,
                 "user_session": user_session
@@ -375,13 +398,19 @@ class MongoDBManager:
             handle_error('database_clear_failed', f"Could not clear database: {str(e)}", show_streamlit=False)
             return False
     
-    def update_interaction_results(self, interaction_id: str, ml_result=None, ai_result=None) -> bool:
-        """Update interaction with ML/AI results"""
+    def update_interaction_results(self, interaction_id: str, ml_result=None, ai_result=None,
+                                   user_session: Optional[str] = None) -> bool:
+        """Update interaction with ML/AI results
+        
+        Pass user_session explicitly when calling outside the Streamlit script thread,
+        where session state is not available.
+        """
         if not self.connected:
             return False
             
         try:
-            user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+            if user_session is None:
+                user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
             update_data = {"updated_at": datetime.now()}
             
             if ml_result:
@@ -443,7 +472,11 @@ class MongoDBManager:
 # Global database manager instance
 _mongodb_manager = None
 
-@st.cache_resource
+# Background writer for MongoDB saves/updates that the UI does not need to wait for
+# (one worker, so writes land in submission order: a save always precedes its updates)
+_db_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mongodb-write')
+
+@st.cache_resource(show_spinner=False)
 def get_mongodb_manager() -> MongoDBManager:
     """Get MongoDB manager instance (cached)"""
     global _mongodb_manager
@@ -465,15 +498,54 @@ def reset_mongodb_manager():
 
 # ==================== HELPER FUNCTIONS ====================
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_interactions_cached(user_session: str, limit: int) -> List[Dict]:
+    """Load interactions for one session, cached so reruns skip the MongoDB round-trip"""
+    return get_mongodb_manager().load_interactions(limit, user_session)
+
+def invalidate_interactions_cache(*_):
+    """Drop cached interaction lists after the collection changes"""
+    _load_interactions_cached.clear()
+
 def save_interaction_to_db(interaction_data: Dict) -> bool:
     """Convenient function to save interaction"""
     db_manager = get_mongodb_manager()
-    return db_manager.save_interaction(interaction_data)
+    saved = db_manager.save_interaction(interaction_data)
+    invalidate_interactions_cache()
+    return saved
+
+def save_interaction_in_background(interaction_data: Dict) -> Future:
+    """Queue an interaction save on the background writer and return its future
+    
+    Failed saves are reported on a later rerun by report_background_save_failures.
+    """
+    db_manager = get_mongodb_manager()
+    # Resolve session-bound values here; the writer thread has no access to st.session_state
+    user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+    failures = st.session_state.setdefault('db_save_failures', [])
+    interaction_id = interaction_data['id']
+    
+    def on_done(future: Future):
+        invalidate_interactions_cache()
+        if future.exception() is not None or not future.result():
+            failures.append(interaction_id)
+    
+    # Shallow copy: the session record may gain results while the write is queued
+    future = _db_write_executor.submit(db_manager.save_interaction, dict(interaction_data), user_session)
+    future.add_done_callback(on_done)
+    return future
+
+def report_background_save_failures():
+    """Show a toast for each background save that failed since the last rerun"""
+    failures = st.session_state.get('db_save_failures')
+    while failures:
+        interaction_id = failures.pop(0)
+        st.toast(f"⚠️ Interaksi {interaction_id} gagal disimpan ke database (hanya tersimpan di session)")
 
 def load_interactions_from_db(limit: int = 50) -> List[Dict]:
     """Convenient function to load interactions"""
-    db_manager = get_mongodb_manager()
-    return db_manager.load_interactions(limit)
+    user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+    return _load_interactions_cached(user_session, limit)
 
 def get_interaction_from_db(interaction_id: str) -> Optional[Dict]:
     """Convenient function to get interaction by ID"""
@@ -483,17 +555,47 @@ def get_interaction_from_db(interaction_id: str) -> Optional[Dict]:
 def delete_interaction_from_db(interaction_id: str) -> bool:
     """Convenient function to delete interaction"""
     db_manager = get_mongodb_manager()
-    return db_manager.delete_interaction(interaction_id)
+    deleted = db_manager.delete_interaction(interaction_id)
+    invalidate_interactions_cache()
+    return deleted
+
+def delete_interaction_in_background(interaction_id: str) -> Future:
+    """Queue an interaction delete on the background writer and return its future
+    
+    Runs after any save still queued for the same interaction, so the upsert can't re-create it.
+    """
+    db_manager = get_mongodb_manager()
+    # Resolve the session here; the writer thread has no access to st.session_state
+    user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+    future = _db_write_executor.submit(db_manager.delete_interaction, interaction_id, user_session)
+    future.add_done_callback(invalidate_interactions_cache)
+    return future
 
 def clear_all_interactions_from_db() -> bool:
     """Convenient function to clear all interactions"""
     db_manager = get_mongodb_manager()
-    return db_manager.clear_all_interactions()
+    cleared = db_manager.clear_all_interactions()
+    invalidate_interactions_cache()
+    return cleared
 
 def update_interaction_results_in_db(interaction_id: str, ml_result=None, ai_result=None) -> bool:
     """Convenient function to update interaction results"""
     db_manager = get_mongodb_manager()
-    return db_manager.update_interaction_results(interaction_id, ml_result, ai_result)
+    updated = db_manager.update_interaction_results(interaction_id, ml_result, ai_result)
+    invalidate_interactions_cache()
+    return updated
+
+def update_interaction_results_in_background(interaction_id: str, ml_result=None, ai_result=None) -> Future:
+    """Queue an interaction results update on the background writer and return its future"""
+    db_manager = get_mongodb_manager()
+    # Resolve the session here; the writer thread has no access to st.session_state
+    user_session = st.session_state.get('session_id', MONGODB_CONFIG['user_session'])
+    future = _db_write_executor.submit(
+        db_manager.update_interaction_results, interaction_id, ml_result, ai_result, user_session
+    )
+    # Invalidate once the write has landed, not before, so a reload can't re-cache stale results
+    future.add_done_callback(invalidate_interactions_cache)
+    return future
 
 def check_database_connection() -> bool:
     """Check database connection status"""
@@ -522,7 +624,8 @@ def sync_session_with_database():
     """Sync session state with database"""
     
     try:
-        # Load latest interactions from database
+        # Load latest interactions from database, bypassing the cached copy
+        invalidate_interactions_cache()
         db_interactions = load_interactions_from_db()
         
         # Update session state
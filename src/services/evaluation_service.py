@@ -6,13 +6,14 @@ Provides comprehensive crop suitability analysis with ML and LLM integration.
 import os
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
+from operator import itemgetter
 import json
 
 # Import services
 from .llm_service import agricultural_llm
 from .knowledge_base import knowledge_base
 from .location_context import location_context_service
-from ..core.ml_predictor import AICropPredictor
+from ..core.ml_predictor import get_predictor, evaluate_crop_suitability_cached
 from ..utils.config import CROP_MAPPING, SENSOR_PARAMS
 from ..utils.helpers import safe_float, format_timestamp
 
@@ -35,7 +36,7 @@ class EvaluationService:
         """Initialize ML predictor if not already loaded"""
         if not self.ml_predictor_loaded:
             try:
-                self.ml_predictor = AICropPredictor()
+                self.ml_predictor = get_predictor()
                 self.ml_predictor_loaded = True
                 print("✅ ML Predictor initialized in evaluation service")
             except Exception as e:
@@ -113,14 +114,12 @@ class EvaluationService:
         if self.ml_predictor and selected_crop:
             try:
                 # Get crop prediction
-                ml_result = self.ml_predictor.evaluate_crop_suitability(
-                    sensor_data, selected_crop
-                )
+                ml_result = evaluate_crop_suitability_cached(sensor_data, selected_crop)
                 
                 ml_analysis["available"] = True
-                ml_analysis["crop_prediction"] = ml_result[0]
-                ml_analysis["confidence"] = ml_result[1]
-                ml_analysis["explanation"] = ml_result[2]
+                ml_analysis["crop_prediction"] = ml_result.recommendation
+                ml_analysis["confidence"] = ml_result.confidence
+                ml_analysis["explanation"] = ml_result.explanation
                 
                 # Get top crop recommendations for comparison
                 if hasattr(self.ml_predictor, 'get_top_crop_recommendations'):
@@ -182,7 +181,7 @@ class EvaluationService:
                     unique_results[result['id']] = result
             
             return sorted(unique_results.values(), 
-                         key=lambda x: x['similarity_score'], reverse=True)[:5]
+                         key=itemgetter('similarity_score'), reverse=True)[:5]
             
         except Exception as e:
             print(f"⚠️ Knowledge base search error: {e}")
@@ -109,6 +109,11 @@ class OpenRouterService:
     
     def test_connection(self) -> bool:
         """Test connection to OpenRouter API"""
+        if not self.api_key:
+            print("⚠️ OPENROUTER_API_KEY not set - OpenRouter disabled")
+            self.is_available = False
+            return False
+        
         try:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -292,6 +297,13 @@ class AgriculturalLLMService:
         Gunakan bahasa Indonesia yang jelas dan ramah.
         """
     
+    def report_missing_api_key(self) -> bool:
+        """Show an error naming OPENROUTER_API_KEY when it is not set; returns True if it is missing"""
+        if self.llm_manager.openrouter.api_key:
+            return False
+        handle_error('llm_api_key_missing', "Set the OPENROUTER_API_KEY environment variable and restart the app")
+        return True
+    
     def generate_crop_evaluation(self, sensor_data: Dict[str, Any], 
                                 location_data: Dict[str, Any] = None,
                                 ml_prediction: Dict[str, Any] = None) -> str:
@@ -96,7 +96,7 @@ def get_user_gps_location():
                         'lng': detected_lng,
                         'accuracy': detected_accuracy,
                         'address': address,
-                        'timestamp': datetime.now().isoformat()
+                        'timestamp': datetime.now().isoformat(timespec='seconds')
                     }
                     
                     # Update session state for form submission
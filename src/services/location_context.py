@@ -14,6 +14,26 @@ from .llm_service import agricultural_llm
 from .knowledge_base import knowledge_base
 from ..utils.helpers import safe_float
 
+# ==================== REGION KEYWORDS ====================
+
+# Address keywords per region, in priority order
+_REGION_KEYWORD_GROUPS = (
+    ("java_west", ("jawa barat", "jabar", "bandung", "bogor", "depok", "bekasi")),
+    ("java_central", ("jawa tengah", "jateng", "semarang", "solo", "yogya", "jogja")),
+    ("java_east", ("jawa timur", "jatim", "surabaya", "malang", "kediri")),
+    ("sumatra", ("sumatera", "sumatra", "medan", "palembang", "lampung", "riau")),
+    ("kalimantan", ("kalimantan", "borneo", "pontianak", "banjarmasin", "samarinda")),
+    ("sulawesi", ("sulawesi", "makassar", "manado", "palu", "kendari")),
+    ("papua", ("papua", "jayapura", "sorong", "merauke")),
+)
+
+# Flattened once at import so region lookup is a single linear scan
+_REGION_KEYWORDS = tuple(
+    (keyword, region)
+    for region, keywords in _REGION_KEYWORD_GROUPS
+    for keyword in keywords
+)
+
 # ==================== LOCATION CONTEXT SERVICE ====================
 
 class LocationContextService:
@@ -175,20 +195,9 @@ class LocationContextService:
         """Determine Indonesian region based on coordinates and address"""
         
         # Address-based determination (more reliable)
-        if any(keyword in address for keyword in ["jawa barat", "jabar", "bandung", "bogor", "depok", "bekasi"]):
-            return "java_west"
-        elif any(keyword in address for keyword in ["jawa tengah", "jateng", "semarang", "solo", "yogya", "jogja"]):
-            return "java_central"
-        elif any(keyword in address for keyword in ["jawa timur", "jatim", "surabaya", "malang", "kediri"]):
-            return "java_east"
-        elif any(keyword in address for keyword in ["sumatera", "sumatra", "medan", "palembang", "lampung", "riau"]):
-            return "sumatra"
-        elif any(keyword in address for keyword in ["kalimantan", "borneo", "pontianak", "banjarmasin", "samarinda"]):
-            return "kalimantan"
-        elif any(keyword in address for keyword in ["sulawesi", "makassar", "manado", "palu", "kendari"]):
-            return "sulawesi"
-        elif any(keyword in address for keyword in ["papua", "jayapura", "sorong", "merauke"]):
-            return "papua"
+        for keyword, region in _REGION_KEYWORDS:
+            if keyword in address:
+                return region
         
         # Coordinate-based determination (fallback)
         if lat != 0 and lng != 0:
@@ -4,6 +4,7 @@ Contains Folium map functionality and map-related operations.
 """
 
 import streamlit as st
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
 # Import config and utilities
@@ -295,8 +296,9 @@ def display_map_system_status():
     
     return status
 
+@lru_cache(maxsize=1)
 def check_map_dependencies() -> Dict[str, bool]:
-    """Check map dependencies and return status"""
+    """Check map dependencies and return status (computed once per process)"""
     
     dependencies = {
         'folium': FOLIUM_AVAILABLE,
@@ -11,7 +11,7 @@ import json
 # Import our services
 from .llm_service import agricultural_llm
 from .knowledge_base import knowledge_base
-from ..core.ml_predictor import AICropPredictor
+from ..core.ml_predictor import get_predictor, evaluate_crop_suitability_cached
 from ..utils.config import CROP_MAPPING, SENSOR_PARAMS
 from ..utils.helpers import format_timestamp, safe_float
 
@@ -33,7 +33,7 @@ class RecommendationEngine:
         """Initialize ML predictor if not already loaded"""
         if not self.ml_predictor_loaded:
             try:
-                self.ml_predictor = AICropPredictor()
+                self.ml_predictor = get_predictor()
                 self.ml_predictor_loaded = True
                 print("✅ ML Predictor initialized in recommendation engine")
             except Exception as e:
@@ -62,15 +62,13 @@ class RecommendationEngine:
         # 1. ML Prediction
         if self.ml_predictor and selected_crop:
             try:
-                ml_result = self.ml_predictor.evaluate_crop_suitability(
-                    sensor_data, selected_crop
-                )
+                ml_result = evaluate_crop_suitability_cached(sensor_data, selected_crop)
                 analysis["ml_prediction"] = {
-                    "crop": ml_result[0],
-                    "confidence": ml_result[1],
-                    "explanation": ml_result[2]
+                    "crop": ml_result.recommendation,
+                    "confidence": ml_result.confidence,
+                    "explanation": ml_result.explanation
                 }
-                analysis["confidence_score"] = ml_result[1]
+                analysis["confidence_score"] = ml_result.confidence
             except Exception as e:
                 print(f"⚠️ ML prediction error: {e}")
                 analysis["warning_flags"].append("ML prediction not available")
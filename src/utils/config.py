@@ -5,6 +5,7 @@ Contains all application settings, environment variables, and global configurati
 
 import os
 import warnings
+from typing import NamedTuple
 from dotenv import load_dotenv
 
 # ==================== ENVIRONMENT & BASIC SETUP ====================
@@ -71,7 +72,7 @@ LLM_CONFIG = {
     },
     'openrouter': {
         'base_url': 'https://openrouter.ai/api/v1',
-        'api_key': os.getenv('OPENROUTER_API_KEY', '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'),
+        'api_key': os.getenv('OPENROUTER_API_KEY', ''),
         'default_model': 'mistralai/mistral-tiny',
         'timeout': 60
     },
@@ -86,7 +87,8 @@ ML_CONFIG = {
     'models': {
         'random_forest': 'best_model_random_forest.pkl',
         'label_encoder': 'label_encoder.pkl',
-        'scaler': 'scaler.pkl'
+        'scaler': 'scaler.pkl',
+        'onnx_model': 'random_forest.onnx'  # optional, see AICropPredictor.export_onnx_model
     },
     'training_data': {
         'X_train': 'X_train.csv',
@@ -95,7 +97,9 @@ ML_CONFIG = {
         'y_test': 'y_test.csv'
     },
     'confidence_threshold': 0.7,
-    'low_confidence_threshold': 0.6
+    'low_confidence_threshold': 0.6,
+    # Seconds without an explanation before the SHAP explainer is freed (0 keeps it loaded)
+    'explainer_idle_timeout': float(os.getenv('EXPLAINER_IDLE_TIMEOUT', '0'))
 }
 
 # ==================== UI CONFIGURATION ====================
@@ -135,15 +139,22 @@ CROP_MAPPING = {
 
 # ==================== SENSOR PARAMETERS ====================
 
+class ParamSpec(NamedTuple):
+    """Valid range, form default and display unit of a sensor parameter"""
+    min: float
+    max: float
+    default: float
+    unit: str
+
 SENSOR_PARAMS = {
-    'nitrogen': {'min': 0.0, 'max': 140.0, 'default': 50.0, 'unit': 'kg/ha'},
-    'phosphorus': {'min': 5.0, 'max': 145.0, 'default': 53.0, 'unit': 'kg/ha'},
-    'potassium': {'min': 5.0, 'max': 205.0, 'default': 48.0, 'unit': 'kg/ha'},
-    'temperature': {'min': 8.8, 'max': 43.7, 'default': 25.0, 'unit': '°C'},
-    'humidity': {'min': 14.3, 'max': 99.9, 'default': 71.0, 'unit': '%'},
-    'ph': {'min': 3.5, 'max': 9.9, 'default': 6.5, 'unit': ''},
-    'rainfall': {'min': 20.2, 'max': 298.6, 'default': 103.0, 'unit': 'mm'},
-    'land_area': {'min': 0.1, 'max': 1000.0, 'default': 1.0, 'unit': 'ha'}
+    'nitrogen': ParamSpec(min=0.0, max=140.0, default=50.0, unit='kg/ha'),
+    'phosphorus': ParamSpec(min=5.0, max=145.0, default=53.0, unit='kg/ha'),
+    'potassium': ParamSpec(min=5.0, max=205.0, default=48.0, unit='kg/ha'),
+    'temperature': ParamSpec(min=8.8, max=43.7, default=25.0, unit='°C'),
+    'humidity': ParamSpec(min=14.3, max=99.9, default=71.0, unit='%'),
+    'ph': ParamSpec(min=3.5, max=9.9, default=6.5, unit=''),
+    'rainfall': ParamSpec(min=20.2, max=298.6, default=103.0, unit='mm'),
+    'land_area': ParamSpec(min=0.1, max=1000.0, default=1.0, unit='ha')
 }
 
 # ==================== ERROR MESSAGES ====================
@@ -155,6 +166,7 @@ ERROR_MESSAGES = {
     'gps_permission_denied': '❌ Akses GPS ditolak',
     'gps_timeout': '❌ Timeout GPS - Coba lagi di area terbuka',
     'llm_connection_failed': '❌ Koneksi LLM gagal',
+    'llm_api_key_missing': '❌ OPENROUTER_API_KEY belum diatur - fitur AI OpenRouter dinonaktifkan',
     'model_loading_failed': '❌ Gagal memuat model ML'
 }
 
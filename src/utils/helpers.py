@@ -5,6 +5,7 @@ Contains utility functions, library checks, and common operations.
 
 import streamlit as st
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
 
 # Update config with library availability
@@ -15,8 +16,9 @@ from .config import (
 
 # ==================== LIBRARY AVAILABILITY CHECKS ====================
 
+@lru_cache(maxsize=1)
 def check_library_availability():
-    """Check and update availability of optional libraries"""
+    """Check and update availability of optional libraries (probed once per process)"""
     global SHAP_AVAILABLE, FOLIUM_AVAILABLE, STREAMLIT_FOLIUM_AVAILABLE, GEOPY_AVAILABLE
     
     # Check SHAP availability
@@ -134,8 +136,8 @@ def validate_sensor_data(data: Dict[str, float]) -> Dict[str, bool]:
     validation_results = {}
     for param, value in data.items():
         if param in SENSOR_PARAMS:
-            param_config = SENSOR_PARAMS[param]
-            is_valid = param_config['min'] <= value <= param_config['max']
+            param_spec = SENSOR_PARAMS[param]
+            is_valid = param_spec.min <= value <= param_spec.max
             validation_results[param] = is_valid
         else:
             validation_results[param] = True  # Unknown param, assume valid
@@ -152,7 +154,7 @@ def sanitize_string(text: str, max_length: int = 100) -> str:
 
 def format_timestamp(timestamp: datetime) -> str:
     """Format timestamp for display"""
-    return timestamp.strftime("%d/%m/%Y %H:%M")
+    return f"{timestamp.day:02d}/{timestamp.month:02d}/{timestamp.year} {timestamp.hour:02d}:{timestamp.minute:02d}"
 
 def format_coordinates(lat: float, lng: float, precision: int = 6) -> str:
     """Format coordinates for display"""